@@ -1,11 +1,30 @@
+import math
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import AsyncIterator, Iterator
+import numpy as np
+import httpx
 import openai
-from faster_whisper import WhisperModel
+from faster_whisper import decode_audio
+from faster_whisper.transcribe import Segment
 from dotenv import load_dotenv
+from ai.whisper_pool import WhisperPool
+from ai.batcher import TranscriptionBatcher
+from ai.response_cache import ResponseCache
+from ai.conversation import Conversation, ConversationStore
+from utils.http import LatencyTracker, hedged_call, hedged_call_async
+from utils.metrics import LLM_SECONDS, LLM_TTFT_SECONDS, observe_transcription
 
 class AIHandler:
-    def __init__(self, whisper_model="tiny.en", gpt_model="gpt-4"):
+    def __init__(self, whisper_model="tiny.en", gpt_model="gpt-4",
+                 whisper_workers=1, whisper_cpu_threads=0, whisper_queue_size=8,
+                 batch_size=8, batch_window_ms=20,
+                 cache_size=512, cache_ttl_sec=86400, cache_fuzzy_threshold=0.0,
+                 history_token_budget=1500, summary_max_tokens=200, max_sessions=1000,
+                 llm_timeout_sec=30.0, llm_retries=2, http_pool_size=16, llm_hedge=False):
         # Load environment variables
         load_dotenv()
         
@@ -14,35 +33,327 @@ class AIHandler:
         if not openai.api_key:
             raise ValueError("OPENAI_API_KEY not found in .env file")
         
-        self.client = openai.OpenAI()
+        # Explicit deadline and retry policy (the SDK retries with jittered
+        # exponential backoff) over keep-alive pools shared by all threads
+        timeout = openai.Timeout(llm_timeout_sec, connect=min(llm_timeout_sec, 5.0))
+        limits = httpx.Limits(max_connections=http_pool_size, max_keepalive_connections=http_pool_size)
+        self.client = openai.OpenAI(
+            timeout=timeout,
+            max_retries=llm_retries,
+            http_client=openai.DefaultHttpxClient(limits=limits)
+        )
+        self.async_client = openai.AsyncOpenAI(
+            timeout=timeout,
+            max_retries=llm_retries,
+            http_client=openai.DefaultAsyncHttpxClient(limits=limits)
+        )
+        # Non-streaming completions past the recent p95 get a duplicate request
+        self.llm_latency = LatencyTracker()
+        self._hedge_executor = ThreadPoolExecutor(max_workers=http_pool_size, thread_name_prefix="llm-hedge") if llm_hedge else None
         self.gpt_model = gpt_model
         self.system_prompt = (
             "You are CypherGuard's technical voice assistant. "
             "Give concise, actionable answers with code snippets when helpful. Keep it very brief and to the point. Donot include any other text or comments and code in the response."
         )
+        self.conversations = ConversationStore(token_budget=history_token_budget, max_sessions=max_sessions)
+        self.summary_max_tokens = summary_max_tokens
+        self.response_cache = None
+        if cache_size > 0:
+            self.response_cache = ResponseCache(
+                max_entries=cache_size,
+                ttl_sec=cache_ttl_sec,
+                fuzzy_threshold=cache_fuzzy_threshold
+            )
         
-        # Initialize Whisper
-        self.whisper = WhisperModel(whisper_model, device="cpu", compute_type="int8")
+        # Initialize Whisper worker pool
+        self.whisper_pool = WhisperPool(
+            whisper_model,
+            workers=whisper_workers,
+            cpu_threads=whisper_cpu_threads,
+            queue_size=whisper_queue_size
+        )
+        self.batcher = None
+        if batch_size > 1:
+            self.batcher = TranscriptionBatcher(
+                self.whisper_pool,
+                window_ms=batch_window_ms,
+                max_batch=batch_size
+            )
+
+    @staticmethod
+    def load_audio(audio_path: Path) -> np.ndarray:
+        """Decode an audio file to 16 kHz mono float32 samples"""
+        try:
+            return decode_audio(str(audio_path), sampling_rate=TranscriptionBatcher.SAMPLE_RATE)
+        except Exception as e:
+            raise Exception(f"Could not decode audio: {str(e)}")
+
+    def transcribe_segments(self, audio: Path | np.ndarray) -> Iterator[Segment]:
+        """Yield Whisper segments (with start/end timestamps) as they are decoded.
+
+        ``audio`` is either a path to an audio file or 16 kHz mono float32 samples.
+        """
+        audio_sec = None
+        if isinstance(audio, Path):
+            audio = str(audio)
+        else:
+            audio_sec = len(audio) / TranscriptionBatcher.SAMPLE_RATE
+        # Only time spent decoding counts, not the caller's work between segments
+        wall = 0.0
+        try:
+            segments = self.whisper_pool.transcribe(audio, vad_filter=False)
+            while True:
+                start = time.perf_counter()
+                segment = next(segments, None)
+                wall += time.perf_counter() - start
+                if segment is None:
+                    break
+                yield segment
+        except Exception as e:
+            raise Exception(f"Transcription failed: {str(e)}")
+        observe_transcription(audio_sec, wall)
+
+    def transcribe_audio(self, audio: Path | np.ndarray) -> str:
+        """Transcribe an audio file or in-memory samples using Whisper.
+
+        Short utterances go through the micro-batcher so that concurrent
+        requests share one batched decode; everything else is decoded alone.
+        """
+        if self.batcher is not None:
+            try:
+                if isinstance(audio, Path):
+                    audio = self.load_audio(audio)
+                if self.batcher.accepts(audio):
+                    start = time.perf_counter()
+                    text = self.batcher.transcribe(audio)
+                    observe_transcription(len(audio) / TranscriptionBatcher.SAMPLE_RATE, time.perf_counter() - start)
+                    return text
+            except Exception as e:
+                raise Exception(f"Transcription failed: {str(e)}")
+        return "".join(s.text for s in self.transcribe_segments(audio)).strip()
+
+    def transcribe_short_answer(self, audio: np.ndarray, max_tokens: int = 4) -> tuple[str, float]:
+        """Cheap greedy decode for one-word answers such as "yes" / "no".
+
+        Decoding is capped at a few tokens with a yes/no prompt, greedy search,
+        no temperature fallback and no timestamps. Returns the text and a
+        confidence in [0, 1] so callers can fall back to full transcription.
+        """
+        def job(model):
+            segments, _ = model.transcribe(
+                audio,
+                beam_size=1,
+                temperature=0.0,
+                without_timestamps=True,
+                condition_on_previous_text=False,
+                initial_prompt="Yes. No.",
+                max_new_tokens=max_tokens,
+                vad_filter=False
+            )
+            segment = next(iter(segments), None)
+            if segment is None:
+                return "", 0.0
+            confidence = math.exp(segment.avg_logprob) * (1.0 - segment.no_speech_prob)
+            return segment.text.strip(), confidence
 
-    def transcribe_audio(self, audio_path: Path) -> str:
-        """Transcribe audio file using Whisper"""
         try:
-            segments, _ = self.whisper.transcribe(str(audio_path), vad_filter=False)
-            return "".join(s.text for s in segments).strip()
+            start = time.perf_counter()
+            result = self.whisper_pool.submit(job).result()
+            observe_transcription(len(audio) / TranscriptionBatcher.SAMPLE_RATE, time.perf_counter() - start)
+            return result
         except Exception as e:
             raise Exception(f"Transcription failed: {str(e)}")
 
-    def get_gpt_response(self, user_input: str) -> str:
-        """Get response from GPT model"""
+    def _messages(self, user_input: str, conversation: Conversation = None) -> list[dict]:
+        """Build the chat messages for a user utterance, with session history if any"""
+        if conversation is not None:
+            return conversation.messages(self.system_prompt, user_input)
+        return [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": user_input}
+        ]
+
+    def _conversation(self, session_id: str | None) -> Conversation | None:
+        if session_id is None:
+            return None
+        return self.conversations.get(session_id)
+
+    def _cached_response(self, user_input: str, conversation: Conversation = None) -> str | None:
+        # Replies that depend on earlier turns are never served from the cache
+        if self.response_cache is None or (conversation is not None and not conversation.empty):
+            return None
+        return self.response_cache.get(self.gpt_model, self.system_prompt, user_input)
+
+    def _record_reply(self, user_input: str, reply: str, conversation: Conversation = None, from_cache=False):
+        """Cache a context-free reply and append the turn to the session's memory"""
+        if not reply:
+            return
+        if self.response_cache is not None and not from_cache and (conversation is None or conversation.empty):
+            self.response_cache.put(self.gpt_model, self.system_prompt, user_input, reply)
+        if conversation is not None and conversation.add_turn(user_input, reply):
+            threading.Thread(target=self._fold, args=(conversation,), daemon=True).start()
+
+    def _fold(self, conversation: Conversation):
+        """Summarize the oldest turns of a conversation into its rolling summary"""
+        turns = conversation.take_overflow()
+        if not turns:
+            return
+        transcript = "\n".join(f"User: {u}\nAssistant: {a}" for u, a in turns)
         try:
             response = self.client.chat.completions.create(
                 model=self.gpt_model,
                 messages=[
-                    {"role": "system", "content": self.system_prompt},
-                    {"role": "user", "content": user_input}
+                    {"role": "system", "content": (
+                        "Merge the previous summary and the new conversation turns into one short summary. "
+                        "Keep facts, names, versions and open questions the assistant may need later."
+                    )},
+                    {"role": "user", "content": f"Previous summary:\n{conversation.summary or '(none)'}\n\nNew turns:\n{transcript}"}
                 ],
+                temperature=0,
+                max_tokens=self.summary_max_tokens
+            )
+            conversation.apply_summary(response.choices[0].message.content.strip(), len(turns))
+        except Exception as e:
+            conversation.abort_fold()
+            print(f"⚠  Conversation summary failed: {e}")
+
+    def record_reply(self, user_input: str, reply: str, session_id: str = None, cache: bool = True):
+        """Add a reply fetched with ``record=False`` to the cache and session history.
+
+        ``cache=False`` only records the turn, e.g. the part of a reply the user
+        heard before interrupting it.
+        """
+        self._record_reply(user_input, reply, self._conversation(session_id), from_cache=not cache)
+
+    def get_gpt_response(self, user_input: str, session_id: str = None, record: bool = True) -> str:
+        """Get response from GPT model.
+
+        With ``record=False`` the reply is neither cached nor added to the
+        session (speculative requests); call ``record_reply`` if it is used.
+        """
+        conversation = self._conversation(session_id)
+        cached = self._cached_response(user_input, conversation)
+        if cached is not None:
+            if record:
+                self._record_reply(user_input, cached, conversation, from_cache=True)
+            return cached
+        messages = self._messages(user_input, conversation)
+        def create():
+            return self.client.chat.completions.create(
+                model=self.gpt_model,
+                messages=messages,
                 temperature=0.3
             )
-            return response.choices[0].message.content.strip()
+        try:
+            with LLM_SECONDS.time():
+                if self._hedge_executor is not None:
+                    response = hedged_call(create, self.llm_latency, self._hedge_executor)
+                else:
+                    response = create()
+            reply = response.choices[0].message.content.strip()
+        except Exception as e:
+            raise Exception(f"GPT request failed: {str(e)}")
+        if record:
+            self._record_reply(user_input, reply, conversation)
+        return reply
+
+    def stream_gpt_response(self, user_input: str, session_id: str = None) -> Iterator[str]:
+        """Stream response tokens from GPT model as they are generated.
+
+        The reply is recorded once it has been read to the end; closing the
+        iterator early (the reply was interrupted) closes the request and
+        records nothing.
+        """
+        conversation = self._conversation(session_id)
+        cached = self._cached_response(user_input, conversation)
+        if cached is not None:
+            yield cached
+            self._record_reply(user_input, cached, conversation, from_cache=True)
+            return
+        parts = []
+        start = time.perf_counter()
+        stream = None
+        try:
+            stream = self.client.chat.completions.create(
+                model=self.gpt_model,
+                messages=self._messages(user_input, conversation),
+                temperature=0.3,
+                stream=True
+            )
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    if not parts:
+                        LLM_TTFT_SECONDS.observe(time.perf_counter() - start)
+                    parts.append(delta)
+                    yield delta
+        except Exception as e:
+            raise Exception(f"GPT request failed: {str(e)}")
+        finally:
+            if stream is not None:
+                stream.close()
+        LLM_SECONDS.observe(time.perf_counter() - start)
+        self._record_reply(user_input, "".join(parts).strip(), conversation)
+
+    async def get_gpt_response_async(self, user_input: str, session_id: str = None) -> str:
+        """Get response from GPT model without blocking the event loop"""
+        conversation = self._conversation(session_id)
+        cached = self._cached_response(user_input, conversation)
+        if cached is not None:
+            self._record_reply(user_input, cached, conversation, from_cache=True)
+            return cached
+        messages = self._messages(user_input, conversation)
+        def create():
+            return self.async_client.chat.completions.create(
+                model=self.gpt_model,
+                messages=messages,
+                temperature=0.3
+            )
+        try:
+            with LLM_SECONDS.time():
+                if self._hedge_executor is not None:
+                    response = await hedged_call_async(create, self.llm_latency)
+                else:
+                    response = await create()
+            reply = response.choices[0].message.content.strip()
+        except Exception as e:
+            raise Exception(f"GPT request failed: {str(e)}")
+        self._record_reply(user_input, reply, conversation)
+        return reply
+
+    async def stream_gpt_response_async(self, user_input: str, session_id: str = None) -> AsyncIterator[str]:
+        """Async counterpart of stream_gpt_response"""
+        conversation = self._conversation(session_id)
+        cached = self._cached_response(user_input, conversation)
+        if cached is not None:
+            yield cached
+            self._record_reply(user_input, cached, conversation, from_cache=True)
+            return
+        parts = []
+        start = time.perf_counter()
+        stream = None
+        try:
+            stream = await self.async_client.chat.completions.create(
+                model=self.gpt_model,
+                messages=self._messages(user_input, conversation),
+                temperature=0.3,
+                stream=True
+            )
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    if not parts:
+                        LLM_TTFT_SECONDS.observe(time.perf_counter() - start)
+                    parts.append(delta)
+                    yield delta
         except Exception as e:
-            raise Exception(f"GPT request failed: {str(e)}") 
\ No newline at end of file
+            raise Exception(f"GPT request failed: {str(e)}")
+        finally:
+            if stream is not None:
+                await stream.close()
+        LLM_SECONDS.observe(time.perf_counter() - start)
+        self._record_reply(user_input, "".join(parts).strip(), conversation)
@@ -0,0 +1,123 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import ctranslate2
+import numpy as np
+from faster_whisper import WhisperModel
+from faster_whisper.tokenizer import Tokenizer
+
+from ai.whisper_pool import WhisperPool
+
+
+def _pad_or_trim(features: np.ndarray, n_frames: int) -> np.ndarray:
+    """Pad or cut log-mel features to Whisper's fixed 30 s window"""
+    if features.shape[-1] > n_frames:
+        return features[:, :n_frames]
+    return np.pad(features, ((0, 0), (0, n_frames - features.shape[-1])))
+
+
+def decode_batch(model: WhisperModel, audios: list[np.ndarray], language: str = "en", beam_size: int = 5,
+                 no_speech_threshold: float = 0.6, log_prob_threshold: float = -1.0) -> list[str]:
+    """Run a single batched encoder/decoder pass over several short utterances.
+
+    Like ``WhisperModel.transcribe``, a clip whose no-speech probability is
+    above ``no_speech_threshold`` (and whose decode is not confident enough
+    to overrule it) yields "" instead of hallucinated text.
+    """
+    n_frames = model.feature_extractor.nb_max_frames
+    features = np.stack([_pad_or_trim(model.feature_extractor(a), n_frames) for a in audios])
+    features = ctranslate2.StorageView.from_array(np.ascontiguousarray(features, dtype=np.float32))
+
+    tokenizer = Tokenizer(model.hf_tokenizer, model.model.is_multilingual, task="transcribe", language=language)
+    prompt = model.get_prompt(tokenizer, [], without_timestamps=True)
+
+    results = model.model.generate(
+        features,
+        [prompt] * len(audios),
+        beam_size=beam_size,
+        max_length=448,
+        suppress_blank=True,
+        suppress_tokens=[-1],
+        return_scores=True,
+        return_no_speech_prob=True
+    )
+    return [_text(tokenizer, r, no_speech_threshold, log_prob_threshold) for r in results]
+
+
+def _text(tokenizer: Tokenizer, result, no_speech_threshold: float, log_prob_threshold: float) -> str:
+    tokens = result.sequences_ids[0]
+    # Same average as faster-whisper (length_penalty=1: the score is the mean log-prob)
+    avg_logprob = result.scores[0] * len(tokens) / (len(tokens) + 1)
+    if result.no_speech_prob > no_speech_threshold and avg_logprob <= log_prob_threshold:
+        return ""
+    return tokenizer.decode(tokens).strip()
+
+
+class TranscriptionBatcher:
+    """Collects concurrent transcription requests into micro-batches.
+
+    Requests that arrive within ``window_ms`` of the first one (up to
+    ``max_batch``) are decoded together in one batched pass on the worker pool.
+    Only utterances that fit in a single 30 s Whisper window are eligible.
+    """
+
+    SAMPLE_RATE = 16000
+    MAX_SAMPLES = 30 * SAMPLE_RATE
+
+    def __init__(self, pool: WhisperPool, window_ms: int = 20, max_batch: int = 8, language: str = "en"):
+        self.pool = pool
+        self.window_sec = window_ms / 1000
+        self.max_batch = max_batch
+        self.language = language
+        self.requests = queue.Queue()
+        threading.Thread(target=self._collect, name="whisper-batcher", daemon=True).start()
+
+    def accepts(self, audio: np.ndarray) -> bool:
+        return len(audio) <= self.MAX_SAMPLES
+
+    def transcribe(self, audio: np.ndarray) -> str:
+        """Queue an utterance and block until its batch has been decoded"""
+        future = Future()
+        self.requests.put((audio, future))
+        return future.result()
+
+    @property
+    def queue_depth(self) -> int:
+        return self.requests.qsize()
+
+    def _collect(self):
+        """Batcher loop: wait for a request, then gather more until the window closes"""
+        while True:
+            batch = [self.requests.get()]
+            deadline = time.monotonic() + self.window_sec
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.requests.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: list[tuple[np.ndarray, Future]]):
+        audios = [audio for audio, _ in batch]
+        futures = [future for _, future in batch]
+
+        def distribute(job: Future):
+            error = job.exception()
+            for i, future in enumerate(futures):
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(job.result()[i])
+
+        try:
+            job = self.pool.submit(decode_batch, audios, self.language)
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+        job.add_done_callback(distribute)
@@ -0,0 +1,104 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) plus per-message overhead"""
+    return len(text) // 4 + 4
+
+
+class Conversation:
+    """One session's memory: a rolling summary followed by recent turns verbatim.
+
+    Turns are only ever appended, and older ones are folded into the summary
+    in one go once the history exceeds ``token_budget`` (down to
+    ``fold_to`` of it). Between folds the prompt prefix is byte-identical from
+    one request to the next, which keeps upstream prompt caching effective.
+    """
+
+    def __init__(self, token_budget: int = 1500, fold_to: float = 0.5):
+        self.token_budget = token_budget
+        self.fold_to = fold_to
+        self.summary = ""
+        self.turns = []
+        self.last_used = time.time()
+        self.folding = False
+        self._lock = threading.Lock()
+
+    @property
+    def empty(self) -> bool:
+        return not self.summary and not self.turns
+
+    def messages(self, system_prompt: str, user_input: str) -> list[dict]:
+        with self._lock:
+            self.last_used = time.time()
+            messages = [{"role": "system", "content": system_prompt}]
+            if self.summary:
+                messages.append({"role": "system", "content": f"Summary of the conversation so far: {self.summary}"})
+            for user, assistant in self.turns:
+                messages.append({"role": "user", "content": user})
+                messages.append({"role": "assistant", "content": assistant})
+        messages.append({"role": "user", "content": user_input})
+        return messages
+
+    def tokens(self) -> int:
+        total = estimate_tokens(self.summary) if self.summary else 0
+        return total + sum(estimate_tokens(u) + estimate_tokens(a) for u, a in self.turns)
+
+    def add_turn(self, user: str, assistant: str) -> bool:
+        """Append a turn; returns True if the history should now be folded"""
+        with self._lock:
+            self.turns.append((user, assistant))
+            return not self.folding and self.tokens() > self.token_budget
+
+    def take_overflow(self) -> list[tuple[str, str]]:
+        """Oldest turns to fold into the summary (they stay in place until applied)"""
+        with self._lock:
+            if self.folding:
+                return []
+            target = self.token_budget * self.fold_to
+            total, count = self.tokens(), 0
+            while count < len(self.turns) - 1 and total > target:
+                user, assistant = self.turns[count]
+                total -= estimate_tokens(user) + estimate_tokens(assistant)
+                count += 1
+            if count:
+                self.folding = True
+            return self.turns[:count]
+
+    def apply_summary(self, summary: str, folded: int):
+        with self._lock:
+            self.summary = summary
+            del self.turns[:folded]
+            self.folding = False
+
+    def abort_fold(self):
+        with self._lock:
+            self.folding = False
+
+
+class ConversationStore:
+    """Per-session conversations, least recently used sessions dropped first"""
+
+    def __init__(self, token_budget: int = 1500, max_sessions: int = 1000, idle_ttl_sec: float = 3600):
+        self.token_budget = token_budget
+        self.max_sessions = max_sessions
+        self.idle_ttl_sec = idle_ttl_sec
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Conversation:
+        now = time.time()
+        with self._lock:
+            conversation = self._sessions.get(session_id)
+            if conversation is None or now - conversation.last_used > self.idle_ttl_sec:
+                conversation = Conversation(self.token_budget)
+                self._sessions[session_id] = conversation
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            return conversation
+
+    def __len__(self) -> int:
+        return len(self._sessions)
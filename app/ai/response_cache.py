@@ -0,0 +1,116 @@
+import hashlib
+import math
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_transcript(text: str) -> str:
+    """Case-fold, drop punctuation and collapse whitespace so trivial variations share a key"""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = _NON_WORD.sub(" ", text)
+    return _SPACES.sub(" ", text).strip()
+
+
+def _trigrams(text: str) -> tuple[Counter, float]:
+    """Character trigram vector and its L2 norm"""
+    padded = f"  {text} "
+    vector = Counter(padded[i:i + 3] for i in range(len(padded) - 2))
+    return vector, math.sqrt(sum(c * c for c in vector.values()))
+
+
+@dataclass
+class _Entry:
+    scope: tuple[str, str]
+    response: str
+    created: float
+    vector: Counter
+    norm: float
+
+
+class ResponseCache:
+    """LRU + TTL cache of GPT replies keyed on (model, system prompt, normalized transcript).
+
+    With ``fuzzy_threshold`` > 0, a miss on the exact key falls back to the
+    most similar cached transcript (cosine similarity of character trigrams)
+    under the same model and system prompt, if it scores at least the threshold.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl_sec: float = 86400, fuzzy_threshold: float = 0.0):
+        self.max_entries = max_entries
+        self.ttl_sec = ttl_sec
+        self.fuzzy_threshold = fuzzy_threshold
+        self.hits = 0
+        self.fuzzy_hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _scope(model: str, system_prompt: str) -> tuple[str, str]:
+        return model, hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+
+    def get(self, model: str, system_prompt: str, transcript: str) -> str | None:
+        scope = self._scope(model, system_prompt)
+        text = normalize_transcript(transcript)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get((scope, text))
+            if entry is not None and now - entry.created <= self.ttl_sec:
+                self._entries.move_to_end((scope, text))
+                self.hits += 1
+                return entry.response
+            if entry is not None:
+                del self._entries[(scope, text)]
+
+            if self.fuzzy_threshold > 0 and text:
+                key = self._most_similar(scope, text, now)
+                if key is not None:
+                    self._entries.move_to_end(key)
+                    self.fuzzy_hits += 1
+                    return self._entries[key].response
+
+            self.misses += 1
+            return None
+
+    def _most_similar(self, scope: tuple[str, str], text: str, now: float):
+        vector, norm = _trigrams(text)
+        best_key, best_score = None, self.fuzzy_threshold
+        for key, entry in self._entries.items():
+            if entry.scope != scope or now - entry.created > self.ttl_sec:
+                continue
+            dot = sum(count * entry.vector.get(gram, 0) for gram, count in vector.items())
+            score = dot / (norm * entry.norm) if norm and entry.norm else 0.0
+            if score >= best_score:
+                best_key, best_score = key, score
+        return best_key
+
+    def put(self, model: str, system_prompt: str, transcript: str, response: str):
+        scope = self._scope(model, system_prompt)
+        text = normalize_transcript(transcript)
+        if not text or not response:
+            return
+        vector, norm = _trigrams(text)
+        with self._lock:
+            self._entries[(scope, text)] = _Entry(scope, response, time.time(), vector, norm)
+            self._entries.move_to_end((scope, text))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.fuzzy_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "fuzzy_hits": self.fuzzy_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.fuzzy_hits) / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,94 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+
+import numpy as np
+
+
+class SpeculativeTurn:
+    """Transcript, and optionally the reply, for the audio captured up to a pause"""
+
+    def __init__(self, transcript: str, reply: Future | None = None):
+        self.transcript = transcript
+        self.reply = reply
+
+
+class Speculator:
+    """Starts work on a turn while the speaker is still pausing.
+
+    Used as the endpointer's probe: once a pause is long enough, the audio
+    so far is transcribed and, when armed, the reply is requested as well.
+    If speech resumes the endpointer discards the turn; if the pause ends
+    the turn, its transcript and reply are reused instead of starting from
+    scratch after the endpoint fires. ``finished`` (if given) judges the
+    transcript for the endpointer.
+    """
+
+    def __init__(self, transcribe: Callable[[np.ndarray], str], respond: Callable[[str], str] = None,
+                 finished: Callable[[str], bool] = None):
+        self.transcribe = transcribe
+        self.respond = respond
+        self.finished = finished
+        self.started = 0
+        self.reused = 0
+        self.discarded = 0
+
+        self._armed = threading.Event()
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def arm(self):
+        """Also prefetch the reply for the next turn (not for e.g. yes/no answers)"""
+        self._armed.set()
+
+    def disarm(self):
+        self._armed.clear()
+
+    def __call__(self, audio: np.ndarray) -> SpeculativeTurn:
+        text = self.transcribe(audio).strip()
+        reply = None
+        if text and self.respond is not None and self._armed.is_set():
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="speculate")
+            reply = self._executor.submit(self.respond, text)
+        self.started += 1
+        return SpeculativeTurn(text, reply)
+
+    def verdict(self, turn: SpeculativeTurn) -> bool | None:
+        if self.finished is None:
+            return None
+        return self.finished(turn.transcript)
+
+    def discard(self, turn: SpeculativeTurn):
+        """Speech resumed: the turn is stale"""
+        if turn.reply is not None:
+            turn.reply.cancel()
+        self.discarded += 1
+
+    def adopt(self, probe: Future | None) -> SpeculativeTurn | None:
+        """Claim the turn from the pause that ended the utterance, disarming the reply prefetch.
+
+        ``probe`` is the endpointer's future for it; waits if it is still running.
+        """
+        self.disarm()
+        if probe is None:
+            return None
+        try:
+            turn = probe.result()
+        except Exception:
+            return None
+        if turn is None or not turn.transcript:
+            return None
+        self.reused += 1
+        return turn
+
+    def close(self):
+        """Cancel queued reply prefetches and stop the prefetch threads"""
+        self.disarm()
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        return {"started": self.started, "reused": self.reused, "discarded": self.discarded}
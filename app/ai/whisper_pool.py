@@ -0,0 +1,159 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, asdict
+from typing import Callable, Iterator
+
+import numpy as np
+from faster_whisper import WhisperModel
+from faster_whisper.transcribe import Segment
+
+_DONE = object()
+
+
+@dataclass
+class WorkerStats:
+    worker_id: int
+    cpu_threads: int
+    jobs: int = 0
+    errors: int = 0
+    busy_sec: float = 0.0
+    busy: bool = False
+    last_job_at: float | None = None
+
+
+class WhisperPool:
+    """Pool of WhisperModel replicas, each owned by a dedicated worker thread.
+
+    CTranslate2 releases the GIL while encoding/decoding, so replicas running
+    on separate threads transcribe in parallel. Each replica is pinned to a
+    share of the cores via ``cpu_threads`` so they don't oversubscribe the CPU.
+    Each worker loads its replica on its own thread, so construction returns
+    immediately and jobs queue up until a model is ready.
+    """
+
+    def __init__(self, model_name: str, workers: int = 1, cpu_threads: int = 0,
+                 queue_size: int = 8, submit_timeout_sec: float = 5.0):
+        if workers < 1:
+            raise ValueError("WhisperPool needs at least one worker")
+        if cpu_threads <= 0:
+            cpu_threads = max(1, (os.cpu_count() or 1) // workers)
+
+        self.model_name = model_name
+        self.submit_timeout_sec = submit_timeout_sec
+        self.jobs = queue.Queue(maxsize=queue_size)
+        self.workers = [WorkerStats(worker_id=i, cpu_threads=cpu_threads) for i in range(workers)]
+        self.load_error = None
+        self._loaded = 0
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+
+        for stats in self.workers:
+            threading.Thread(
+                target=self._work, args=(stats,), name=f"whisper-{stats.worker_id}", daemon=True
+            ).start()
+
+    @property
+    def ready(self) -> bool:
+        """True once every replica has been loaded"""
+        return self._ready.is_set()
+
+    def wait_ready(self, timeout_sec: float = None) -> bool:
+        return self._ready.wait(timeout_sec)
+
+    def _load(self, stats: WorkerStats) -> WhisperModel | None:
+        try:
+            model = WhisperModel(self.model_name, device="cpu", compute_type="int8", cpu_threads=stats.cpu_threads)
+        except Exception as e:
+            with self._lock:
+                self.load_error = e
+            print(f"⚠  Whisper worker {stats.worker_id} could not load {self.model_name}: {e}")
+            return None
+        with self._lock:
+            self._loaded += 1
+            if self._loaded == len(self.workers):
+                self._ready.set()
+        return model
+
+    def _work(self, stats: WorkerStats):
+        """Worker loop: load this thread's model replica, then run queued jobs against it"""
+        model = self._load(stats)
+        while True:
+            fn, args, future = self.jobs.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            if model is None:
+                future.set_exception(Exception(f"Whisper model failed to load: {self.load_error}"))
+                continue
+
+            with self._lock:
+                stats.busy = True
+            started = time.perf_counter()
+            try:
+                result = fn(model, *args)
+            except Exception as e:
+                with self._lock:
+                    stats.errors += 1
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+            finally:
+                with self._lock:
+                    stats.busy = False
+                    stats.jobs += 1
+                    stats.busy_sec += time.perf_counter() - started
+                    stats.last_job_at = time.time()
+
+    def submit(self, fn: Callable, *args) -> Future:
+        """Queue ``fn(model, *args)`` for the next free worker"""
+        future = Future()
+        try:
+            self.jobs.put((fn, args, future), timeout=self.submit_timeout_sec)
+        except queue.Full:
+            raise Exception("Transcription queue is full, try again later")
+        return future
+
+    def transcribe(self, audio: str | np.ndarray, **kwargs) -> Iterator[Segment]:
+        """Transcribe on a pooled replica, yielding segments as the worker decodes them"""
+        segments_q = queue.Queue()
+
+        def job(model: WhisperModel):
+            try:
+                segments, _ = model.transcribe(audio, **kwargs)
+                for segment in segments:
+                    segments_q.put(segment)
+            finally:
+                segments_q.put(_DONE)
+
+        future = self.submit(job)
+        while True:
+            item = segments_q.get()
+            if item is _DONE:
+                break
+            yield item
+        future.result()
+
+    def warm_up(self, audio: np.ndarray):
+        """Run one throwaway decode per worker so the first real request skips allocation"""
+        def job(model: WhisperModel):
+            segments, _ = model.transcribe(audio, beam_size=1, vad_filter=False)
+            list(segments)
+
+        for future in [self.submit(job) for _ in self.workers]:
+            future.result()
+
+    @property
+    def queue_depth(self) -> int:
+        return self.jobs.qsize()
+
+    def stats(self) -> dict:
+        """Snapshot of queue depth and per-worker counters"""
+        with self._lock:
+            return {
+                "queue_depth": self.queue_depth,
+                "queue_size": self.jobs.maxsize,
+                "ready": self.ready,
+                "workers": [asdict(w) for w in self.workers],
+            }
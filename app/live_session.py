@@ -0,0 +1,170 @@
+import json
+import threading
+import uuid
+from contextlib import closing
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable
+
+import numpy as np
+import webrtcvad
+
+from speech.audio_handler import AudioHandler
+from speech.segmenter import END, ONSET, StreamSegmenter
+from utils.metrics import Gauge
+
+if TYPE_CHECKING:
+    from app.voice_assistant import VoiceAssistant
+
+
+class LiveSession:
+    """One client streaming microphone audio to the server (WebSocket).
+
+    Incoming 16 kHz int16 mono PCM is segmented per connection with the same
+    VAD, adaptive endpointing and speculative transcription as the local
+    loop. Events go out through ``send`` (called from several threads):
+
+        speech_start, partial_transcript   while the user speaks
+        transcript                         when the turn ends
+        gpt_chunk, audio, gpt, end         the streamed reply
+        interrupted                        the user spoke over the reply
+        {"status": "error", ...}           a turn failed
+
+    Speaking over a reply stops the rest of it (barge-in).
+    """
+
+    active = 0
+    _count_lock = threading.Lock()
+
+    def __init__(self, assistant: "VoiceAssistant", send: Callable[[dict], None], session_id: str = None):
+        config = assistant.config
+        self.assistant = assistant
+        self.send = send
+        self.session_id = session_id or f"live-{uuid.uuid4().hex[:8]}"
+        self.partial_ms = config.LIVE_PARTIAL_MS
+
+        self.speculator = assistant.build_speculator(self.session_id)
+        self.endpointer = assistant.build_endpointer(self.speculator)
+        self.segmenter = StreamSegmenter(
+            webrtcvad.Vad(config.VAD_MODE),
+            timeout_sec=config.END_SILENCE_SEC,
+            sample_rate=config.SAMPLE_RATE,
+            frame_ms=config.FRAME_MS,
+            preroll_ms=config.CAPTURE_PREROLL_MS,
+            max_utterance_sec=config.MAX_UTTERANCE_SEC,
+            endpointer=self.endpointer
+        )
+        if self.speculator is not None:
+            self.speculator.arm()
+
+        # Bumped at every speech start and turn end; work started in an
+        # older epoch (partials, a reply being streamed) is stale
+        self._epoch = 0
+        self._partial: Future | None = None
+        self._partial_at_ms = 0
+        self._turns = ThreadPoolExecutor(max_workers=1, thread_name_prefix="live-turn")
+        self._partials = ThreadPoolExecutor(max_workers=1, thread_name_prefix="live-partial")
+
+        with LiveSession._count_lock:
+            LiveSession.active += 1
+
+    def feed(self, data: bytes):
+        """Handle a chunk of PCM from the client"""
+        for event in self.segmenter.push(data):
+            if event.kind == ONSET:
+                self._epoch += 1
+                self._partial_at_ms = 0
+                self.send({"type": "speech_start"})
+            elif event.kind == END:
+                self._end_turn(event.pcm, event.flags)
+
+        if self.segmenter.in_utterance and self.segmenter.utterance_ms - self._partial_at_ms >= self.partial_ms:
+            if self._partial is None or self._partial.done():
+                self._partial_at_ms = self.segmenter.utterance_ms
+                pcm = self.segmenter.utterance()[0]
+                self._partial = self._partials.submit(self._send_partial, pcm, self._epoch)
+
+    def control(self, message: str):
+        """Handle a JSON text message from the client"""
+        try:
+            kind = json.loads(message).get("type")
+        except (ValueError, AttributeError):
+            self.send({"status": "error", "message": "Expected a JSON object"})
+            return
+        if kind == "end_of_speech":
+            # Push-to-talk released: end the turn without waiting for silence
+            event = self.segmenter.flush()
+            if event is not None:
+                self._end_turn(event.pcm, event.flags)
+
+    def close(self):
+        self._epoch += 1
+        self._partials.shutdown(wait=False, cancel_futures=True)
+        self._turns.shutdown(wait=False, cancel_futures=True)
+        if self.endpointer is not None:
+            self.endpointer.close()
+        if self.speculator is not None:
+            self.speculator.close()
+        with LiveSession._count_lock:
+            LiveSession.active -= 1
+
+    def _end_turn(self, pcm: np.ndarray, flags: np.ndarray):
+        self._epoch += 1
+        probe = self.endpointer.take_probe() if self.endpointer is not None else None
+        self._turns.submit(self._respond, pcm, flags, probe, self._epoch)
+
+    def _send_partial(self, pcm: np.ndarray, epoch: int):
+        try:
+            text = self.assistant.ai_handler.transcribe_audio(AudioHandler.pcm_to_float32(pcm))
+        except Exception as e:
+            print(f"⚠  Partial transcription failed: {e}")
+            return
+        if epoch == self._epoch and text:
+            self.send({"type": "partial_transcript", "value": text})
+
+    def _transcribe(self, pcm: np.ndarray, flags: np.ndarray) -> str:
+        if self.assistant.config.VAD_TRIM:
+            pcm = self.assistant.trim_utterance(pcm, flags)
+        return self.assistant.ai_handler.transcribe_audio(AudioHandler.pcm_to_float32(pcm))
+
+    def _record(self, transcript: str, reply: str, cache: bool = True):
+        self.assistant.ai_handler.record_reply(transcript, reply, self.session_id, cache=cache)
+
+    def _respond(self, pcm: np.ndarray, flags: np.ndarray, probe: Future | None, epoch: int):
+        """Final transcript and streamed reply for one turn (on the turn thread)"""
+        try:
+            speculative = None
+            if self.speculator is not None:
+                speculative = self.speculator.adopt(probe)
+                self.speculator.arm()
+            transcript = speculative.transcript if speculative is not None else self._transcribe(pcm, flags)
+            self.send({"type": "transcript", "value": transcript})
+            if not transcript:
+                return
+
+            reply = self.assistant.adopt_reply(transcript, speculative, self.session_id, record=False)
+            sentences = []
+            with closing(self.assistant.stream_reply(transcript, self.session_id, reply=reply)) as chunks:
+                for index, (sentence, audio_path) in enumerate(chunks):
+                    if epoch != self._epoch:
+                        # Barge-in: closing the stream stops GPT before the reply is
+                        # recorded; the session keeps only the part that was sent
+                        self._record(transcript, " ".join(sentences), cache=False)
+                        self.send({"type": "interrupted"})
+                        return
+                    sentences.append(sentence)
+                    self.send({"type": "gpt_chunk", "index": index, "value": sentence})
+                    if audio_path is not None:
+                        self.send({"type": "audio", "index": index, "value": f"/audio/{audio_path.name}"})
+            if reply is not None:
+                self._record(transcript, reply)
+            self.send({"type": "gpt", "value": " ".join(sentences)})
+            self.send({"type": "end"})
+        except Exception as e:
+            print(f"❌ Live turn failed: {e}")
+            try:
+                self.send({"status": "error", "message": str(e)})
+            except Exception:
+                pass
+
+
+Gauge("voice_live_sessions", "Open live audio connections", lambda: LiveSession.active)
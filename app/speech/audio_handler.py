@@ -1,100 +1,309 @@
-import queue
+import shutil
+import threading
 import wave
 import pathlib
 import subprocess
 import signal
-import sounddevice as sd
+import time
+from typing import BinaryIO, Iterator
+import numpy as np
 import webrtcvad
-import pyttsx3
-from gtts import gTTS
-import requests.sessions as rs
+from speech.capture import CaptureEngine
+from speech.endpointing import Endpointer
+from speech.gtts_client import PooledGTTS
+from speech.tts_cache import TTSCache
+from speech.tts_renderer import OfflineTTSRenderer
+from speech.vad import speech_flags, trim_silence
+from utils.http import HttpClient
+from utils.metrics import PLAYBACK_SECONDS, TTS_FIRST_CHUNK_SECONDS, TTS_SECONDS, VAD_SECONDS, WAV_WRITE_SECONDS
 
 class AudioHandler:
-    def __init__(self, sample_rate=16000, frame_ms=20, channels=1, vad_mode=2):
+    TTS_ENGINE = "gtts"
+
+    def __init__(self, sample_rate=16000, frame_ms=20, channels=1, vad_mode=2, tts_cache: TTSCache = None,
+                 preroll_ms=300, max_utterance_sec=30.0, trim_silence=True, trim_pad_ms=300, max_pause_ms=1000,
+                 http: HttpClient = None, gtts_timeout_sec=5, tts_endpoint=None,
+                 renderer: OfflineTTSRenderer = None, endpointer: Endpointer = None):
         self.SAMPLE_RATE = sample_rate
         self.FRAME_MS = frame_ms
         self.CHANNELS = channels
         self.FRAME_LEN = self.SAMPLE_RATE * self.FRAME_MS // 1000
         
         self.vad = webrtcvad.Vad(vad_mode)
-        self.audio_q = queue.Queue()
-        self.engine = pyttsx3.init()
-        
-        # Create output directory
-        self.OUT_DIR = pathlib.Path("audio")
-        self.OUT_DIR.mkdir(exist_ok=True)
+        self.preroll_ms = preroll_ms
+        self.max_utterance_sec = max_utterance_sec
+        self.trim_silence = trim_silence
+        self.trim_pad_frames = trim_pad_ms // frame_ms
+        self.max_pause_frames = max_pause_ms // frame_ms
+        # Adaptive end-of-turn detection; None keeps the fixed silence timeout
+        self.endpointer = endpointer
+
+        # Microphone capture and the offline TTS engine are only built when
+        # first used, so the HTTP server never touches PortAudio or espeak
+        self._capture = None
+        self._engine = None
+        self._lock = threading.Lock()
         
         # TTS settings
         self.TTS_LANG = "en"
-        self.GTTS_TIMEOUT_SEC = 5
+        self.GTTS_TIMEOUT_SEC = gtts_timeout_sec
+        self.tts_endpoint = tts_endpoint or None
+        self.renderer = renderer
+        self.tts_cache = tts_cache
+        self.http = http or HttpClient(timeout_sec=gtts_timeout_sec)
 
-    def _audio_callback(self, indata, *_):
-        """Callback for audio input stream"""
-        self.audio_q.put(indata.copy().tobytes())
+    @property
+    def capture(self) -> CaptureEngine:
+        with self._lock:
+            if self._capture is None:
+                self._capture = CaptureEngine(
+                    self.vad,
+                    sample_rate=self.SAMPLE_RATE,
+                    frame_ms=self.FRAME_MS,
+                    channels=self.CHANNELS,
+                    preroll_ms=self.preroll_ms,
+                    max_utterance_sec=self.max_utterance_sec
+                )
+            return self._capture
 
-    def write_wav(self, path: pathlib.Path, pcm: bytes):
+    @property
+    def engine(self):
+        with self._lock:
+            if self._engine is None:
+                import pyttsx3
+                self._engine = pyttsx3.init()
+            return self._engine
+
+    def write_wav(self, path: pathlib.Path, pcm: bytes | np.ndarray):
         """Write PCM data to WAV file"""
-        with wave.open(str(path), "wb") as wf:
+        with WAV_WRITE_SECONDS.time(), wave.open(str(path), "wb") as wf:
             wf.setnchannels(self.CHANNELS)
             wf.setsampwidth(2)
             wf.setframerate(self.SAMPLE_RATE)
             wf.writeframes(pcm)
 
+    @staticmethod
+    def pcm_to_float32(pcm: bytes | np.ndarray) -> np.ndarray:
+        """Convert int16 PCM to the float32 samples Whisper expects, without touching disk"""
+        samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32)
+        samples *= 1 / 32768.0
+        return samples
+
+    def trim(self, pcm: np.ndarray, flags: np.ndarray) -> np.ndarray:
+        """Cut leading/trailing silence and collapse long pauses using VAD flags"""
+        return trim_silence(pcm, flags, self.FRAME_LEN, self.trim_pad_frames, self.max_pause_frames)
+
+    def trim_samples(self, samples: np.ndarray) -> np.ndarray:
+        """Run the VAD over float32 samples (e.g. a decoded upload) and trim silence"""
+        with VAD_SECONDS.time():
+            pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16)
+            flags = speech_flags(self.vad, pcm, self.SAMPLE_RATE, self.FRAME_LEN)
+            return self.trim(samples, flags)
+
     def say_offline(self, text: str):
         """Use offline TTS engine"""
         self.engine.say(text)
         self.engine.runAndWait()
 
     def try_gtts(self, text: str, mp3_path: pathlib.Path) -> bool:
-        """Try to use Google TTS with timeout"""
+        """Try to use Google TTS with timeout, serving repeated phrases from the cache"""
+        with TTS_SECONDS.time():
+            return self._try_gtts(text, mp3_path)
+
+    def _open_cached(self, text: str) -> BinaryIO | None:
+        """The cached MP3 for text, opened; None on a miss or if it was evicted since the lookup"""
+        if self.tts_cache is None:
+            return None
+        cached = self.tts_cache.get(text, self.TTS_LANG, self.TTS_ENGINE)
+        if cached is None:
+            return None
+        try:
+            # Once open, a concurrent eviction (unlink) no longer affects the read
+            return open(cached, "rb")
+        except FileNotFoundError:
+            return None
+
+    def _try_gtts(self, text: str, mp3_path: pathlib.Path) -> bool:
+        cached = self._open_cached(text)
+        if cached is not None:
+            with cached, open(mp3_path, "wb") as out:
+                shutil.copyfileobj(cached, out)
+            return True
+
         try:
-            orig = rs.Session.request
-            def limited(self, *a, **kw):
-                kw.setdefault("timeout", self.GTTS_TIMEOUT_SEC)
-                return orig(self, *a, **kw)
-            rs.Session.request = limited
-            gTTS(text, lang=self.TTS_LANG).save(str(mp3_path))
+            PooledGTTS(
+                text, self.http, timeout_sec=self.GTTS_TIMEOUT_SEC, endpoint=self.tts_endpoint, lang=self.TTS_LANG
+            ).save(str(mp3_path))
+            if self.tts_cache is not None:
+                self.tts_cache.put(text, self.TTS_LANG, self.TTS_ENGINE, mp3_path)
             return True
         except Exception as e:
             print(f"⚠  gTTS failed ({e.__class__.__name__}: {e}). Falling back to offline TTS.")
             mp3_path.unlink(missing_ok=True)
             return False
+
+    def stream_tts(self, text: str, tee_path: pathlib.Path = None) -> Iterator[bytes]:
+        """Yield MP3 bytes for text as gTTS returns them, one text part at a time.
+
+        Cached phrases are read from the TTS cache. New audio is written to
+        ``tee_path`` (if given) as it streams and added to the cache once
+        complete. gTTS errors propagate; there is no offline fallback
+        mid-stream.
+        """
+        started = time.perf_counter()
+        first = True
+        cached = self._open_cached(text)
+        if cached is not None:
+            with cached:
+                if tee_path is not None:
+                    with open(tee_path, "wb") as tee:
+                        shutil.copyfileobj(cached, tee)
+                    cached.seek(0)
+                while chunk := cached.read(64 * 1024):
+                    if first:
+                        TTS_FIRST_CHUNK_SECONDS.observe(time.perf_counter() - started)
+                        first = False
+                    yield chunk
+            return
+
+        target = tee_path
+        if target is None and self.tts_cache is not None:
+            target = self.tts_cache.dir / f"stream_{threading.get_ident()}_{time.monotonic_ns()}.mp3.tmp"
+        out = open(target, "wb") if target is not None else None
+        complete = False
+        try:
+            tts = PooledGTTS(text, self.http, timeout_sec=self.GTTS_TIMEOUT_SEC, endpoint=self.tts_endpoint, lang=self.TTS_LANG)
+            for chunk in tts.stream():
+                if first:
+                    TTS_FIRST_CHUNK_SECONDS.observe(time.perf_counter() - started)
+                    first = False
+                if out is not None:
+                    out.write(chunk)
+                yield chunk
+            complete = True
         finally:
-            rs.Session.request = orig
+            if out is not None:
+                out.close()
+                if complete and self.tts_cache is not None:
+                    self.tts_cache.put(text, self.TTS_LANG, self.TTS_ENGINE, target, move=tee_path is None)
+                elif not complete:
+                    target.unlink(missing_ok=True)
+            if complete:
+                TTS_SECONDS.observe(time.perf_counter() - started)
+
+    def prewarm(self, texts: list[str]):
+        """Synthesize fixed prompts into the TTS cache ahead of time"""
+        if self.tts_cache is None:
+            return
+        for text in texts:
+            if self.tts_cache.get(text, self.TTS_LANG, self.TTS_ENGINE) is not None:
+                continue
+            tmp = self.tts_cache.dir / f"prewarm_{threading.get_ident()}.mp3.tmp"
+            if self.try_gtts(text, tmp):
+                tmp.unlink(missing_ok=True)
+
+    def synthesize(self, text: str, mp3_path: pathlib.Path) -> pathlib.Path | None:
+        """Render text to an audio file without playing it.
+
+        Returns ``mp3_path`` if gTTS succeeded, otherwise a WAV next to it from
+        the offline renderer, or None if that is unavailable or fails too.
+        """
+        if self.try_gtts(text, mp3_path):
+            return mp3_path
+        if self.renderer is None:
+            return None
+        wav_path = mp3_path.with_suffix(".wav")
+        try:
+            with TTS_SECONDS.time():
+                return self.renderer.render(text, wav_path)
+        except Exception as e:
+            print(f"⚠  {e}")
+            wav_path.unlink(missing_ok=True)
+            return None
+
+    def play(self, path: pathlib.Path) -> subprocess.Popen:
+        """Start playing an audio file with ffplay and return without waiting"""
+        return subprocess.Popen(
+            ["ffplay", "-nodisp", "-autoexit", "-loglevel", "quiet", str(path)],
+            stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT
+        )
 
     def speak(self, text: str, mp3_path: pathlib.Path):
         """Speak text using either online or offline TTS"""
-        if self.try_gtts(text, mp3_path):
-            proc = subprocess.Popen(
-                ["ffplay", "-nodisp", "-autoexit", "-loglevel", "quiet", str(mp3_path)],
-                stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT
-            )
+        if not self.try_gtts(text, mp3_path):
+            with PLAYBACK_SECONDS.time():
+                self.say_offline(text)
+            return
+        with PLAYBACK_SECONDS.time():
+            proc = self.play(mp3_path)
             try:
                 proc.wait()
             except KeyboardInterrupt:
                 proc.send_signal(signal.SIGINT)
                 proc.wait()
                 raise
-        else:
+
+    def speak_with_barge_in(self, text: str, mp3_path: pathlib.Path, timeout_sec: float,
+                            onset_ms: int = 100) -> np.ndarray | None:
+        """Speak text while listening, stopping playback if the user talks over it.
+
+        The microphone and VAD keep running during playback; once speech has
+        lasted ``onset_ms``, ffplay is killed and recording continues until
+        the end of the turn. Returns that utterance (as from
+        ``record_until_silence``), or None if playback finished uninterrupted.
+        Without echo cancellation, use headphones so the reply itself does
+        not count as speech.
+        """
+        audio_path = self.synthesize(text, mp3_path)
+        if audio_path is None:
             self.say_offline(text)
+            return None
+
+        started = time.perf_counter()
+        proc = self.play(audio_path)
+        finished = threading.Event()
+
+        def wait_playback():
+            proc.wait()
+            PLAYBACK_SECONDS.observe(time.perf_counter() - started)
+            finished.set()
+
+        def interrupt():
+            proc.kill()
+            print("✋ Barge-in: playback stopped")
+
+        threading.Thread(target=wait_playback, daemon=True).start()
+        try:
+            pcm, flags = self.capture.record(
+                timeout_sec,
+                onset_frames=max(1, onset_ms // self.FRAME_MS),
+                cancel=finished,
+                on_onset=interrupt,
+                endpointer=self.endpointer
+            )
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+        if len(pcm) == 0:
+            return None
+        return self._finish_utterance(pcm, flags)
+
+    def record_until_silence(self, timeout_sec: float, probe: bool = True) -> np.ndarray:
+        """Record audio until silence is detected.
+
+        With an endpointer, ``timeout_sec`` is the longest pause allowed;
+        clear ends of turns close sooner. ``probe=False`` skips the
+        endpointer's pause probe (and so any speculative transcription).
+        Returns int16 samples (empty if nobody spoke) as a view into the
+        capture ring, valid until the next recording starts. Leading and
+        trailing silence is trimmed using the VAD decisions made while recording.
+        """
+        pcm, flags = self.capture.record(timeout_sec, endpointer=self.endpointer, probe=probe)
+        return self._finish_utterance(pcm, flags)
 
-    def record_until_silence(self, timeout_sec: float) -> bytes:
-        """Record audio until silence is detected"""
-        buf, silent_frames, spoke = [], 0, False
-        with sd.InputStream(
-            channels=self.CHANNELS,
-            samplerate=self.SAMPLE_RATE,
-            blocksize=self.FRAME_LEN,
-            dtype="int16",
-            callback=self._audio_callback
-        ):
-            while True:
-                frame = self.audio_q.get()
-                buf.append(frame)
-                if self.vad.is_speech(frame, self.SAMPLE_RATE):
-                    spoke, silent_frames = True, 0
-                else:
-                    silent_frames += 1
-                if spoke and silent_frames * self.FRAME_MS / 1000 >= timeout_sec:
-                    break
-        return b"".join(buf) if spoke else b"" 
\ No newline at end of file
+    def _finish_utterance(self, pcm: np.ndarray, flags: np.ndarray) -> np.ndarray:
+        start = time.perf_counter()
+        if self.trim_silence and len(pcm):
+            pcm = self.trim(pcm, flags)
+        VAD_SECONDS.observe(self.capture.vad_sec + time.perf_counter() - start)
+        return pcm
@@ -0,0 +1,131 @@
+import threading
+import time
+from typing import Callable
+
+import numpy as np
+import webrtcvad
+
+from speech.endpointing import Endpointer
+from speech.segmenter import END, ONSET, TurnDetector
+from utils.metrics import CAPTURE_SECONDS
+
+
+class CaptureEngine:
+    """Microphone capture into a preallocated ring buffer of int16 frames.
+
+    The PortAudio callback copies each block straight into its ring slot, so
+    there are no per-frame allocations and memory stays bounded no matter how
+    long the microphone is left open. Frames are handed to the VAD as views
+    into the ring, and the finished utterance is returned as a view as well
+    (it is only valid until the next ``record`` call).
+    """
+
+    # Extra frames beyond the longest utterance so the callback can run ahead
+    # of the VAD loop without overwriting audio that has not been read yet.
+    SLACK_FRAMES = 50
+
+    def __init__(self, vad: webrtcvad.Vad, sample_rate=16000, frame_ms=20, channels=1,
+                 preroll_ms=300, max_utterance_sec=30.0):
+        self.vad = vad
+        self.SAMPLE_RATE = sample_rate
+        self.FRAME_MS = frame_ms
+        self.CHANNELS = channels
+        self.FRAME_LEN = sample_rate * frame_ms // 1000
+
+        self.preroll_frames = preroll_ms // frame_ms
+        self.max_frames = int(max_utterance_sec * 1000 // frame_ms)
+        self.capacity = self.preroll_frames + self.max_frames + self.SLACK_FRAMES
+        self.frames = np.zeros((self.capacity, self.FRAME_LEN), dtype=np.int16)
+        self.speech = np.zeros(self.capacity, dtype=bool)
+
+        self.overruns = 0
+        self.vad_sec = 0.0
+        self._written = 0
+        self._cond = threading.Condition()
+
+    def _callback(self, indata, *_):
+        """PortAudio callback: copy the block into its ring slot"""
+        self.frames[self._written % self.capacity] = indata[:, 0]
+        with self._cond:
+            self._written += 1
+            self._cond.notify()
+
+    def _next_frame(self, read: int) -> int:
+        """Block until frame ``read`` is available; skip ahead if the ring overran"""
+        with self._cond:
+            while self._written <= read:
+                self._cond.wait()
+            written = self._written
+        if written - read > self.capacity - 1:
+            self.overruns += written - read - (self.capacity - 1)
+            read = written - (self.capacity - 1)
+        return read
+
+    def is_speech(self, frame: np.ndarray) -> bool:
+        return self.vad.is_speech(memoryview(frame).cast("B"), self.SAMPLE_RATE)
+
+    def _ring_slice(self, ring: np.ndarray, start: int, end: int) -> np.ndarray:
+        """Ring entries [start, end), as a view when they don't wrap"""
+        first, n = start % self.capacity, end - start
+        if first + n <= self.capacity:
+            return ring[first:first + n]
+        return np.concatenate((ring[first:], ring[:first + n - self.capacity]))
+
+    def utterance(self, start: int, end: int) -> tuple[np.ndarray, np.ndarray]:
+        """Samples and per-frame VAD flags for ring frames [start, end)"""
+        return self._ring_slice(self.frames, start, end).reshape(-1), self._ring_slice(self.speech, start, end)
+
+    def record(self, timeout_sec: float, onset_frames: int = 1, cancel: threading.Event = None,
+               on_onset: Callable[[], None] = None, endpointer: Endpointer = None,
+               probe: bool = True) -> tuple[np.ndarray, np.ndarray]:
+        """Record one utterance, ending after ``timeout_sec`` of silence or at the max length.
+
+        The utterance starts after ``onset_frames`` consecutive speech frames,
+        at which point ``on_onset`` is called (barge-in uses it to stop
+        playback). If ``cancel`` is set before then, nothing is returned.
+        With an ``endpointer`` the end of the turn is adaptive and
+        ``timeout_sec`` is only the longest silence it may wait for;
+        ``probe=False`` keeps its pause probe from running for this utterance.
+
+        Returns the int16 samples and the VAD decision for each frame. Time
+        spent in the VAD is left in ``vad_sec``.
+        """
+        # Imported here: PortAudio is only needed with a real microphone, not in HTTP mode
+        import sounddevice as sd
+
+        with self._cond:
+            self._written = 0
+        read = 0
+        detector = TurnDetector(self.FRAME_MS, timeout_sec, onset_frames, self.preroll_frames,
+                                self.max_frames, endpointer)
+        self.vad_sec = 0.0
+        began = time.perf_counter()
+
+        with sd.InputStream(
+            channels=self.CHANNELS,
+            samplerate=self.SAMPLE_RATE,
+            blocksize=self.FRAME_LEN,
+            dtype="int16",
+            callback=self._callback
+        ):
+            while True:
+                if detector.start is None and cancel is not None and cancel.is_set():
+                    break
+                read = self._next_frame(read)
+                slot = read % self.capacity
+                t0 = time.perf_counter()
+                self.speech[slot] = self.is_speech(self.frames[slot])
+                self.vad_sec += time.perf_counter() - t0
+                audio = (lambda: self.utterance(detector.start, read + 1)) if probe else None
+                event = detector.push(read, bool(self.speech[slot]), audio=audio)
+                read += 1
+
+                if event == ONSET and on_onset is not None:
+                    on_onset()
+                elif event == END:
+                    break
+
+        CAPTURE_SECONDS.observe(time.perf_counter() - began)
+        if detector.start is None:
+            return np.zeros(0, dtype=np.int16), np.zeros(0, dtype=bool)
+        return self.utterance(detector.start, read)
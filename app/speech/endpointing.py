@@ -0,0 +1,169 @@
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+import numpy as np
+
+
+class Endpointer:
+    """Adaptive end-of-turn detection from per-frame VAD decisions.
+
+    Instead of a fixed silence timeout, the trailing silence needed to end a
+    turn ("hold") is derived from:
+
+    - smoothed VAD: an exponential moving average with hysteresis, so single
+      misclassified frames neither end a pause nor start one;
+    - the speaker's own pauses: the ``pause_quantile`` of recent mid-turn
+      pauses times ``pause_margin`` (people who pause a lot get more time);
+    - utterance length: very short answers ("yes", "no") close faster;
+    - an optional ``probe`` that gets the audio so far once the silence
+      reaches ``probe_after_ms`` and says whether it sounds finished. It runs
+      on a helper thread; "finished" ends the turn once ``min_silence_ms``
+      has passed, "unfinished" keeps it open up to the ceiling.
+
+    The probe may return any result, e.g. speculative work for the turn;
+    ``verdict`` turns it into finished / unfinished / None (no opinion).
+    If speech resumes the result is passed to ``on_discard``; the one from
+    the pause that ended the turn is collected with ``take_probe``. The
+    probe gets the audio after ``trim`` (samples, VAD flags -> samples), so
+    it sees what the final transcription would. A superseded probe that has
+    not started is skipped, and one that is still running does not hold up
+    the next pause's probe.
+
+    The hold is clamped to [``min_silence_ms``, ceiling], where the ceiling is
+    given per utterance to ``reset`` (the caller's old fixed timeout).
+    """
+
+    def __init__(self, frame_ms: int = 20, min_silence_ms: int = 300, default_silence_ms: int = 800,
+                 smoothing: float = 0.35, pause_quantile: float = 0.9, pause_margin: float = 1.3,
+                 short_utterance_ms: int = 700, probe: Callable[[np.ndarray], Any] = None,
+                 probe_after_ms: int = 250, history: int = 50, verdict: Callable[[Any], bool | None] = bool,
+                 on_discard: Callable[[Any], None] = None,
+                 trim: Callable[[np.ndarray, np.ndarray], np.ndarray] = None):
+        self.frame_ms = frame_ms
+        self.min_silence_ms = min_silence_ms
+        self.default_silence_ms = default_silence_ms
+        self.smoothing = smoothing
+        self.pause_quantile = pause_quantile
+        self.pause_margin = pause_margin
+        self.short_utterance_ms = short_utterance_ms
+        self.probe = probe
+        self.probe_after_ms = probe_after_ms
+        self.verdict = verdict
+        self.on_discard = on_discard
+        self.trim = trim
+
+        # Speaker statistics survive across turns
+        self.pauses = deque(maxlen=history)
+        self._executor = None
+        self._probe_future: Future | None = None
+        self._probe_dropped: threading.Event | None = None  # set when the current probe is superseded
+        self.reset(2000)
+
+    def reset(self, max_silence_ms: float):
+        """Start a new utterance that may wait at most ``max_silence_ms`` of silence"""
+        self.max_silence_ms = max_silence_ms
+        self.level = 1.0
+        self.speaking = True
+        self.voiced_frames = 0
+        self.silent_frames = 0
+        self.last_hold_ms = None
+        self._discard_probe()
+
+    def hold_ms(self) -> float:
+        """Trailing silence required to end the turn right now"""
+        if self._probe_verdict is True:
+            return self.min_silence_ms
+        if self._probe_verdict is False:
+            return self.max_silence_ms
+        if len(self.pauses) >= 5:
+            hold = float(np.quantile(self.pauses, self.pause_quantile)) * self.pause_margin
+        else:
+            hold = self.default_silence_ms
+        if self.voiced_frames * self.frame_ms < self.short_utterance_ms:
+            hold *= 0.6
+        return min(max(hold, self.min_silence_ms), self.max_silence_ms)
+
+    def push(self, is_speech: bool, audio: Callable[[], tuple[np.ndarray, np.ndarray]] = None) -> bool:
+        """Feed one frame's VAD decision; returns True once the turn has ended.
+
+        ``audio`` returns the utterance so far (samples and per-frame VAD
+        flags) and is only called for the probe.
+        """
+        self.level += self.smoothing * (float(is_speech) - self.level)
+        if self.speaking and self.level < 0.3:
+            self.speaking = False
+        elif not self.speaking and self.level > 0.6:
+            self.speaking = True
+            pause_ms = self.silent_frames * self.frame_ms
+            if pause_ms >= 100:
+                self.pauses.append(pause_ms)
+            self.silent_frames = 0
+            self._discard_probe()
+
+        if self.speaking:
+            self.voiced_frames += 1
+            return False
+
+        self.silent_frames += 1
+        silence_ms = self.silent_frames * self.frame_ms
+        self._check_probe(silence_ms, audio)
+        hold = self.hold_ms()
+        if silence_ms >= hold:
+            self.last_hold_ms = silence_ms
+            return True
+        return False
+
+    def _check_probe(self, silence_ms: float, audio: Callable[[], tuple[np.ndarray, np.ndarray]] | None):
+        if self.probe is None or audio is None:
+            return
+        if self._probe_future is None and silence_ms >= self.probe_after_ms:
+            if self._executor is None:
+                # Two workers: a superseded probe still running (Whisper can't be
+                # interrupted) must not delay the probe for the next pause
+                self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="endpoint-probe")
+            pcm, flags = audio()
+            if self.trim is not None:
+                pcm = self.trim(pcm, flags)
+            self._probe_dropped = threading.Event()
+            self._probe_future = self._executor.submit(self._run_probe, self._probe_dropped, np.array(pcm))
+        elif self._probe_future is not None and not self._probe_checked and self._probe_future.done():
+            self._probe_checked = True
+            try:
+                self._probe_verdict = self.verdict(self._probe_future.result())
+            except Exception as e:
+                # No verdict: the statistical hold applies
+                print(f"⚠  Endpoint probe failed: {e}")
+
+    def _run_probe(self, dropped: threading.Event, audio: np.ndarray) -> Any:
+        if dropped.is_set():
+            return None  # superseded while queued
+        return self.probe(audio)
+
+    def _discard_probe(self):
+        """Drop the current pause's probe; its result goes to ``on_discard``"""
+        if self._probe_dropped is not None:
+            self._probe_dropped.set()
+        future = self._probe_future
+        if future is not None and not future.cancel() and self.on_discard is not None:
+            def discard(f: Future):
+                if f.exception() is None and f.result() is not None:
+                    self.on_discard(f.result())
+            future.add_done_callback(discard)
+        self._probe_future, self._probe_dropped = None, None
+        self._probe_checked, self._probe_verdict = False, None
+
+    def close(self):
+        """Stop the probe thread(s); a probe already running finishes in the background"""
+        self._discard_probe()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def take_probe(self) -> Future | None:
+        """The probe started during the pause that ended the turn, if any.
+
+        Handed out once; it may still be running.
+        """
+        future, self._probe_future, self._probe_dropped = self._probe_future, None, None
+        return future
@@ -0,0 +1,47 @@
+import base64
+import re
+
+import requests
+from gtts import gTTS, gTTSError
+
+from utils.http import HttpClient
+
+_AUDIO_LINE = re.compile(r'jQ1olc","\[\\"(.*)\\"]')
+
+
+class PooledGTTS(gTTS):
+    """gTTS whose requests go through a shared HttpClient.
+
+    Stock gTTS opens a new ``requests.Session`` (and TLS connection) for
+    every text part; here the parts reuse pooled keep-alive connections and
+    get the client's deadline and retry policy. ``endpoint`` replaces the
+    Google URL, e.g. to point at a local stand-in when benchmarking.
+    """
+
+    def __init__(self, text: str, http: HttpClient, timeout_sec: float = None, endpoint: str = None, **kwargs):
+        super().__init__(text, timeout=timeout_sec, **kwargs)
+        self.http = http
+        self.endpoint = endpoint
+
+    def stream(self):
+        """Request each text part and yield its decoded MP3 bytes"""
+        for pr in self._prepare_requests():
+            if self.endpoint:
+                pr.prepare_url(self.endpoint, None)
+            response = None
+            try:
+                response = self.http.send(pr, timeout_sec=self.timeout)
+                response.raise_for_status()
+            except requests.exceptions.HTTPError:
+                raise gTTSError(tts=self, response=response)
+            except requests.exceptions.RequestException:
+                raise gTTSError(tts=self)
+
+            for line in response.iter_lines(chunk_size=1024):
+                decoded_line = line.decode("utf-8")
+                if "jQ1olc" not in decoded_line:
+                    continue
+                audio_search = _AUDIO_LINE.search(decoded_line)
+                if audio_search is None:
+                    raise gTTSError(tts=self, response=response)
+                yield base64.b64decode(audio_search.group(1).encode("ascii"))
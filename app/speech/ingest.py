@@ -0,0 +1,258 @@
+import asyncio
+import io
+import queue
+import shutil
+import subprocess
+import threading
+import time
+from typing import AsyncIterable, Iterable
+
+import numpy as np
+
+from utils.metrics import DECODE_SECONDS
+
+
+class AudioTooLongError(Exception):
+    """The upload is longer than the ingest limit"""
+
+
+class _Decoding:
+    """One upload being piped through an ffmpeg process.
+
+    Compressed bytes go to ffmpeg's stdin from a writer thread while reader
+    threads collect float32 PCM from its stdout and the tail of its stderr,
+    so no pipe can fill up and stall the others. A chunk that cannot be
+    queued within ``timeout_sec`` (ffmpeg stopped reading) kills ffmpeg.
+    Once the limit is reached ffmpeg is killed and later writes fail fast.
+    """
+
+    ERROR_TAIL_BYTES = 4096
+    QUEUED_CHUNKS = 8
+
+    def __init__(self, proc: subprocess.Popen, max_bytes: int, timeout_sec: float):
+        self.proc = proc
+        self.max_bytes = max_bytes
+        self.timeout_sec = timeout_sec
+        self.pcm = bytearray()
+        self.errors = bytearray()
+        self.too_long = False
+        self.closed = False  # ffmpeg stopped reading (bad input); finish() reports why
+        self._ended = False
+        self._chunks = queue.Queue(maxsize=self.QUEUED_CHUNKS)
+        self._reader = threading.Thread(target=self._read, daemon=True)
+        self._error_reader = threading.Thread(target=self._read_errors, daemon=True)
+        self._writer = threading.Thread(target=self._write, daemon=True)
+        for thread in (self._reader, self._error_reader, self._writer):
+            thread.start()
+
+    def _read(self):
+        while True:
+            chunk = self.proc.stdout.read1(64 * 1024)
+            if not chunk:
+                return
+            self.pcm += chunk
+            if len(self.pcm) > self.max_bytes:
+                self.too_long = True
+                self.proc.kill()
+                return
+
+    def _read_errors(self):
+        while chunk := self.proc.stderr.read1(self.ERROR_TAIL_BYTES):
+            self.errors += chunk
+            del self.errors[:-self.ERROR_TAIL_BYTES]
+
+    def _write(self):
+        while (chunk := self._chunks.get()) is not None:
+            if self.closed:
+                continue
+            try:
+                self.proc.stdin.write(chunk)
+            except (BrokenPipeError, ValueError):
+                self.closed = True
+        try:
+            self.proc.stdin.close()
+        except (BrokenPipeError, ValueError):
+            pass
+
+    def _put(self, chunk: bytes | None):
+        try:
+            self._chunks.put(chunk, timeout=self.timeout_sec)
+        except queue.Full:
+            self.proc.kill()
+            raise Exception(f"ffmpeg stopped reading input for {self.timeout_sec}s")
+
+    def write(self, chunk: bytes):
+        if self.too_long:
+            raise AudioTooLongError()
+        if self.closed:
+            return
+        self._put(chunk)
+
+    def finish(self) -> np.ndarray:
+        self._ended = True
+        self._put(None)
+        self._reader.join(self.timeout_sec)
+        if self._reader.is_alive():
+            self.proc.kill()
+            raise Exception(f"Decoding timed out after {self.timeout_sec}s")
+        if self.too_long:
+            raise AudioTooLongError()
+        if self.proc.wait() != 0:
+            self._error_reader.join(1)
+            error = self.errors.decode("utf-8", "replace").strip()
+            raise Exception(error.splitlines()[-1] if error else f"ffmpeg exited with {self.proc.returncode}")
+        usable = len(self.pcm) - len(self.pcm) % 4
+        return np.frombuffer(self.pcm, dtype=np.float32, count=usable // 4).copy()
+
+    def abort(self):
+        if self.proc.poll() is None:
+            self.proc.kill()
+        if not self._ended:
+            # Writes fail fast once ffmpeg is gone, so the writer drains the queue and exits
+            self._ended = True
+            try:
+                self._chunks.put(None, timeout=self.timeout_sec)
+            except queue.Full:
+                pass
+
+
+class AudioDecoderPool:
+    """Decodes uploads (webm/opus/ogg/mp3/wav/...) to 16 kHz mono float32 in memory.
+
+    Each upload is streamed through ffmpeg over pipes as it arrives, so
+    nothing is written to disk and the audio is decoded exactly once.
+    ``pool_size`` ffmpeg processes are started ahead of time and wait on
+    their stdin, which takes process start-up off the request path; a used
+    one is replaced in the background. Uploads longer than ``max_sec`` are
+    rejected while reading. Without ffmpeg on the PATH the upload is
+    buffered and decoded with PyAV instead, still in memory.
+    """
+
+    def __init__(self, sample_rate=16000, max_sec=60.0, pool_size=2, timeout_sec=30.0, ffmpeg="ffmpeg"):
+        self.sample_rate = sample_rate
+        self.max_sec = max_sec
+        self.pool_size = pool_size
+        self.timeout_sec = timeout_sec
+        self.ffmpeg = shutil.which(ffmpeg)
+        self.decoded = 0
+        self.rejected = 0
+        self.failed = 0
+
+        self._idle = queue.Queue()
+        self._started = False
+        self._lock = threading.Lock()
+
+    @property
+    def max_bytes(self) -> int:
+        return int(self.max_sec * self.sample_rate) * 4
+
+    def _spawn(self) -> subprocess.Popen:
+        return subprocess.Popen(
+            [self.ffmpeg, "-hide_banner", "-loglevel", "error", "-i", "pipe:0",
+             "-f", "f32le", "-acodec", "pcm_f32le", "-ac", "1", "-ar", str(self.sample_rate), "pipe:1"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+
+    def _refill(self):
+        try:
+            self._idle.put(self._spawn())
+        except OSError as e:
+            print(f"⚠  Could not start ffmpeg: {e}")
+
+    def start(self):
+        """Spawn the idle decoders (otherwise done on first use)"""
+        with self._lock:
+            if self._started or self.ffmpeg is None:
+                return
+            self._started = True
+        for _ in range(self.pool_size):
+            self._refill()
+
+    def _take(self) -> subprocess.Popen:
+        self.start()
+        while True:
+            try:
+                proc = self._idle.get_nowait()
+            except queue.Empty:
+                proc = self._spawn()
+                break
+            if proc.poll() is None:
+                break
+        threading.Thread(target=self._refill, daemon=True).start()
+        return proc
+
+    def _fallback(self, data: bytes) -> np.ndarray:
+        from faster_whisper import decode_audio
+
+        samples = decode_audio(io.BytesIO(data), sampling_rate=self.sample_rate)
+        if len(samples) > self.max_sec * self.sample_rate:
+            raise AudioTooLongError()
+        return samples
+
+    def _done(self, samples: np.ndarray, started: float) -> np.ndarray:
+        DECODE_SECONDS.observe(time.perf_counter() - started)
+        self.decoded += 1
+        return samples
+
+    def _error(self, e: Exception):
+        if isinstance(e, AudioTooLongError):
+            self.rejected += 1
+            raise AudioTooLongError(f"Audio is longer than the {self.max_sec:.0f}s limit")
+        self.failed += 1
+        raise Exception(f"Could not decode audio: {str(e)}")
+
+    def decode(self, chunks: Iterable[bytes]) -> np.ndarray:
+        """Decode an upload given as a stream of byte chunks"""
+        started = time.perf_counter()
+        try:
+            if self.ffmpeg is None:
+                data = bytearray()
+                for chunk in chunks:
+                    data += chunk
+                return self._done(self._fallback(bytes(data)), started)
+
+            decoding = _Decoding(self._take(), self.max_bytes, self.timeout_sec)
+            try:
+                for chunk in chunks:
+                    decoding.write(chunk)
+                return self._done(decoding.finish(), started)
+            finally:
+                decoding.abort()
+        except Exception as e:
+            self._error(e)
+
+    async def decode_async(self, chunks: AsyncIterable[bytes]) -> np.ndarray:
+        """``decode`` for an async body stream; pipe I/O runs on executor threads"""
+        started = time.perf_counter()
+        try:
+            if self.ffmpeg is None:
+                data = bytearray()
+                async for chunk in chunks:
+                    data += chunk
+                return self._done(await asyncio.to_thread(self._fallback, bytes(data)), started)
+
+            decoding = _Decoding(await asyncio.to_thread(self._take), self.max_bytes, self.timeout_sec)
+            try:
+                async for chunk in chunks:
+                    await asyncio.to_thread(decoding.write, chunk)
+                return self._done(await asyncio.to_thread(decoding.finish), started)
+            finally:
+                decoding.abort()
+        except Exception as e:
+            self._error(e)
+
+    def shutdown(self):
+        while True:
+            try:
+                self._idle.get_nowait().kill()
+            except queue.Empty:
+                return
+
+    def stats(self) -> dict:
+        return {
+            "ffmpeg": self.ffmpeg is not None,
+            "idle_decoders": self._idle.qsize(),
+            "decoded": self.decoded,
+            "rejected": self.rejected,
+            "failed": self.failed,
+        }
@@ -0,0 +1,170 @@
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+import webrtcvad
+
+from speech.endpointing import Endpointer
+from utils.metrics import ENDPOINT_SILENCE_SECONDS
+
+ONSET = "onset"
+END = "end"
+
+
+class TurnDetector:
+    """Per-frame turn taking shared by microphone capture and streamed audio.
+
+    Fed one VAD decision per frame index, it reports ONSET after
+    ``onset_frames`` consecutive speech frames and END after ``timeout_sec``
+    of silence (with an ``endpointer``: its adaptive hold, up to
+    ``timeout_sec``) or at the maximum length. ``start`` is the first frame
+    of the utterance, ``preroll_frames`` before the speech began.
+    """
+
+    def __init__(self, frame_ms: int, timeout_sec: float, onset_frames: int = 1, preroll_frames: int = 0,
+                 max_frames: int = 1500, endpointer: Endpointer = None):
+        self.frame_ms = frame_ms
+        self.timeout_sec = timeout_sec
+        self.onset_frames = onset_frames
+        self.preroll_frames = preroll_frames
+        self.max_frames = max_frames
+        self.endpointer = endpointer
+
+        self.start = None
+        self.speech_run = 0
+        self.silent_frames = 0
+
+    def push(self, index: int, is_speech: bool,
+             audio: Callable[[], tuple[np.ndarray, np.ndarray]] = None) -> str | None:
+        """Feed frame ``index``; ``audio`` returns the utterance so far and its VAD flags (for the endpointer's probe)"""
+        if is_speech:
+            self.speech_run += 1
+            self.silent_frames = 0
+        else:
+            self.speech_run = 0
+            self.silent_frames += 1
+
+        onset = False
+        if self.start is None:
+            if self.speech_run < self.onset_frames:
+                return None
+            self.start = max(0, index - self.speech_run + 1 - self.preroll_frames)
+            if self.endpointer is not None:
+                self.endpointer.reset(self.timeout_sec * 1000)
+            onset = True
+
+        if self._ended(index, is_speech, audio):
+            return END
+        return ONSET if onset else None
+
+    def _ended(self, index: int, is_speech: bool, audio: Callable[[], tuple[np.ndarray, np.ndarray]] | None) -> bool:
+        if self.endpointer is not None:
+            if self.endpointer.push(is_speech, audio=audio):
+                ENDPOINT_SILENCE_SECONDS.observe(self.endpointer.last_hold_ms / 1000)
+                return True
+        elif self.silent_frames * self.frame_ms / 1000 >= self.timeout_sec:
+            ENDPOINT_SILENCE_SECONDS.observe(self.timeout_sec)
+            return True
+        if index + 1 - self.start >= self.preroll_frames + self.max_frames:
+            print(f"⚠  Reached maximum utterance length ({self.max_frames * self.frame_ms / 1000:.0f}s)")
+            return True
+        return False
+
+
+@dataclass
+class TurnEvent:
+    kind: str
+    pcm: np.ndarray | None = None  # int16 samples of the utterance (END only)
+    flags: np.ndarray | None = None  # per-frame VAD decisions for ``pcm``
+
+
+class StreamSegmenter:
+    """Push-based counterpart of CaptureEngine for audio arriving over the network.
+
+    ``push`` takes 16-bit little-endian mono PCM in chunks of any size, runs
+    the VAD on each full frame and returns the resulting TurnEvents. Between
+    utterances only the preroll is kept, so memory is bounded by the
+    maximum utterance length.
+    """
+
+    def __init__(self, vad: webrtcvad.Vad, timeout_sec: float, sample_rate=16000, frame_ms=20, preroll_ms=300,
+                 max_utterance_sec=30.0, onset_frames=1, endpointer: Endpointer = None):
+        self.vad = vad
+        self.timeout_sec = timeout_sec
+        self.SAMPLE_RATE = sample_rate
+        self.FRAME_MS = frame_ms
+        self.FRAME_LEN = sample_rate * frame_ms // 1000
+        self.preroll_frames = preroll_ms // frame_ms
+        self.max_frames = int(max_utterance_sec * 1000 // frame_ms)
+        self.onset_frames = onset_frames
+        self.endpointer = endpointer
+
+        self._pending = bytearray()
+        self._frames: list[np.ndarray] = []
+        self._flags: list[bool] = []
+        self._base = 0  # frame index of _frames[0]
+        self._index = 0
+        self.detector = self._new_detector()
+
+    def _new_detector(self) -> TurnDetector:
+        return TurnDetector(self.FRAME_MS, self.timeout_sec, self.onset_frames, self.preroll_frames,
+                            self.max_frames, self.endpointer)
+
+    @property
+    def in_utterance(self) -> bool:
+        return self.detector.start is not None
+
+    @property
+    def utterance_ms(self) -> int:
+        """Length of the current utterance so far (0 between utterances)"""
+        if self.detector.start is None:
+            return 0
+        return (self._index - self.detector.start) * self.FRAME_MS
+
+    def utterance(self) -> tuple[np.ndarray, np.ndarray]:
+        """Samples and VAD flags of the current utterance so far"""
+        first = self.detector.start - self._base
+        return np.concatenate(self._frames[first:]), np.array(self._flags[first:], dtype=bool)
+
+    def push(self, data: bytes) -> list[TurnEvent]:
+        self._pending += data
+        frame_bytes = self.FRAME_LEN * 2
+        n_frames = len(self._pending) // frame_bytes
+        events = []
+        for i in range(n_frames):
+            frame = np.frombuffer(self._pending, dtype="<i2", count=self.FRAME_LEN, offset=i * frame_bytes)
+            frame = frame.astype(np.int16)
+            flag = self.vad.is_speech(memoryview(frame).cast("B"), self.SAMPLE_RATE)
+            self._frames.append(frame)
+            self._flags.append(flag)
+
+            event = self.detector.push(self._index, flag, audio=self.utterance)
+            self._index += 1
+            if event == ONSET:
+                events.append(TurnEvent(ONSET))
+            elif event == END:
+                events.append(self._finish())
+            elif self.detector.start is None:
+                self._drop_to_preroll()
+        del self._pending[:n_frames * frame_bytes]
+        return events
+
+    def flush(self) -> TurnEvent | None:
+        """End the current utterance now (e.g. the client released push-to-talk)"""
+        if self.detector.start is None:
+            return None
+        return self._finish()
+
+    def _finish(self) -> TurnEvent:
+        pcm, flags = self.utterance()
+        self._frames, self._flags = [], []
+        self._base = self._index
+        self.detector = self._new_detector()
+        return TurnEvent(END, pcm, flags)
+
+    def _drop_to_preroll(self):
+        excess = len(self._frames) - (self.preroll_frames + self.onset_frames)
+        if excess > 0:
+            del self._frames[:excess]
+            del self._flags[:excess]
+            self._base += excess
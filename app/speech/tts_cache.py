@@ -0,0 +1,96 @@
+import hashlib
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+
+class TTSCache:
+    """Content-addressed store of synthesized audio with LRU eviction.
+
+    Entries are keyed by a hash of (engine, lang, text) and stored as
+    ``<key>.mp3`` under ``cache_dir``. The in-memory index keeps recency
+    order and sizes so eviction never has to scan the directory.
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int = 50 * 1024 * 1024):
+        self.dir = Path(cache_dir)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self._index = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def key(text: str, lang: str, engine: str) -> str:
+        return hashlib.sha256(f"{engine}\0{lang}\0{text}".encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.dir / f"{key}.mp3"
+
+    def _load(self):
+        """Rebuild the index from disk, least recently used first"""
+        entries = []
+        for entry in os.scandir(self.dir):
+            if entry.name.endswith(".mp3") and entry.is_file():
+                st = entry.stat()
+                entries.append((st.st_atime, entry.name[:-4], st.st_size))
+            elif entry.name.endswith(".tmp"):
+                os.unlink(entry.path)
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._bytes += size
+        self._evict()
+
+    def get(self, text: str, lang: str, engine: str) -> Path | None:
+        """Return the cached file for this utterance, if any"""
+        key = self.key(text, lang, engine)
+        with self._lock:
+            if key in self._index:
+                path = self._path(key)
+                if path.exists():
+                    self._index.move_to_end(key)
+                    self.hits += 1
+                    return path
+                self._bytes -= self._index.pop(key)
+            self.misses += 1
+            return None
+
+    def put(self, text: str, lang: str, engine: str, src: Path, move: bool = False) -> Path:
+        """Store ``src`` under this utterance's key and evict down to the byte budget"""
+        key = self.key(text, lang, engine)
+        path = self._path(key)
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        if move:
+            os.replace(src, tmp)
+        else:
+            shutil.copyfile(src, tmp)
+        os.replace(tmp, path)
+
+        size = path.stat().st_size
+        with self._lock:
+            self._bytes += size - self._index.pop(key, 0)
+            self._index[key] = size
+            self._evict()
+        return path
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and len(self._index) > 1:
+            key, size = self._index.popitem(last=False)
+            self._bytes -= size
+            self._path(key).unlink(missing_ok=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._index),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -0,0 +1,100 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+_engine = None
+
+
+def _init_worker():
+    """Create this worker process's pyttsx3 engine once"""
+    global _engine
+    import pyttsx3
+    _engine = pyttsx3.init()
+
+
+def _render(text: str, wav_path: str) -> str:
+    _engine.save_to_file(text, wav_path)
+    _engine.runAndWait()
+    if not os.path.exists(wav_path) or os.path.getsize(wav_path) == 0:
+        raise RuntimeError("offline TTS produced no audio")
+    return wav_path
+
+
+class OfflineTTSRenderer:
+    """Renders text to WAV files with pyttsx3 (espeak on Linux) in worker processes.
+
+    Nothing is played, so it works on a headless server, and each worker
+    owns its own engine so rendering runs on several cores in parallel.
+    At most ``workers + queue_size`` renders are in flight; beyond that
+    ``render`` gives up after ``timeout_sec`` instead of queueing forever.
+    Worker processes are started on first use.
+    """
+
+    def __init__(self, workers: int = 0, queue_size: int = 16, timeout_sec: float = 30.0):
+        if workers <= 0:
+            workers = max(1, (os.cpu_count() or 2) // 2)
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout_sec = timeout_sec
+        self.rendered = 0
+        self.failed = 0
+
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn, not fork: the server process runs CTranslate2 and HTTP threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker
+                )
+            return self._executor
+
+    def render(self, text: str, wav_path: Path) -> Path:
+        """Render ``text`` into ``wav_path``, blocking until done"""
+        if not self._slots.acquire(timeout=self.timeout_sec):
+            raise Exception("Offline TTS queue is full")
+        try:
+            future = self._pool().submit(_render, text, str(wav_path))
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+
+        try:
+            future.result(timeout=self.timeout_sec)
+        except FutureTimeout:
+            self.failed += 1
+            raise Exception(f"Offline TTS timed out after {self.timeout_sec}s")
+        except BrokenProcessPool as e:
+            # A worker died (e.g. the engine crashed); start a fresh pool next time
+            self.failed += 1
+            self.shutdown()
+            raise Exception(f"Offline TTS failed: {str(e)}")
+        except Exception as e:
+            self.failed += 1
+            raise Exception(f"Offline TTS failed: {str(e)}")
+        self.rendered += 1
+        return wav_path
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "started": self._executor is not None,
+            "rendered": self.rendered,
+            "failed": self.failed,
+        }
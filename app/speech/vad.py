@@ -0,0 +1,38 @@
+import numpy as np
+import webrtcvad
+
+
+def speech_flags(vad: webrtcvad.Vad, pcm: np.ndarray, sample_rate: int, frame_len: int) -> np.ndarray:
+    """Run the VAD over int16 samples and return one speech/non-speech flag per frame"""
+    n_frames = len(pcm) // frame_len
+    frames = pcm[:n_frames * frame_len].reshape(n_frames, frame_len)
+    flags = np.zeros(n_frames, dtype=bool)
+    for i in range(n_frames):
+        flags[i] = vad.is_speech(memoryview(frames[i]).cast("B"), sample_rate)
+    return flags
+
+
+def trim_silence(samples: np.ndarray, flags: np.ndarray, frame_len: int,
+                 pad_frames: int = 15, max_pause_frames: int = 50) -> np.ndarray:
+    """Drop leading/trailing silence and shorten long pauses using per-frame VAD flags.
+
+    ``pad_frames`` of context are kept on each side of every speech run, so a
+    pause longer than ``max_pause_frames`` collapses to ``2 * pad_frames``.
+    If the VAD found no speech at all the samples are returned unchanged.
+    """
+    speech = np.flatnonzero(flags)
+    if speech.size == 0:
+        return samples
+
+    max_pause_frames = max(max_pause_frames, 2 * pad_frames)
+    breaks = np.flatnonzero(np.diff(speech) - 1 > max_pause_frames)
+    starts = np.concatenate(([speech[0]], speech[breaks + 1]))
+    ends = np.concatenate((speech[breaks], [speech[-1]])) + 1
+
+    n_frames = len(flags)
+    pieces = []
+    for start, end in zip(starts, ends):
+        first = max(0, start - pad_frames) * frame_len
+        last = len(samples) if end + pad_frames >= n_frames else (end + pad_frames) * frame_len
+        pieces.append(samples[first:last])
+    return pieces[0] if len(pieces) == 1 else np.concatenate(pieces)
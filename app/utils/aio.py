@@ -0,0 +1,57 @@
+import asyncio
+import contextvars
+from concurrent.futures import Executor
+from typing import AsyncIterator, Callable, Iterable, Iterator
+
+_DONE = object()
+
+
+async def iterate_in_executor(fn: Callable[..., Iterable], *args, executor: Executor = None) -> AsyncIterator:
+    """Drive a blocking generator on an executor thread and yield its items asynchronously"""
+    loop = asyncio.get_running_loop()
+    items = asyncio.Queue()
+
+    def pump():
+        try:
+            for item in fn(*args):
+                loop.call_soon_threadsafe(items.put_nowait, item)
+            loop.call_soon_threadsafe(items.put_nowait, _DONE)
+        except Exception as e:
+            loop.call_soon_threadsafe(items.put_nowait, e)
+
+    # Carry the caller's context (e.g. its request trace) onto the worker thread
+    loop.run_in_executor(executor, contextvars.copy_context().run, pump)
+    while True:
+        item = await items.get()
+        if item is _DONE:
+            break
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+
+async def step_in_executor(iterator: Iterator, executor: Executor = None) -> AsyncIterator:
+    """Advance a blocking iterator one item at a time on an executor thread.
+
+    Unlike ``iterate_in_executor`` no thread is held between items, and when
+    the consumer stops early (e.g. the client disconnected) the iterator is
+    closed instead of being run to the end.
+    """
+    loop = asyncio.get_running_loop()
+    step = None
+    try:
+        while True:
+            step = loop.run_in_executor(executor, contextvars.copy_context().run, next, iterator, _DONE)
+            # Shielded: a cancelled consumer must not abandon the step running on the thread
+            item = await asyncio.shield(step)
+            if item is _DONE:
+                break
+            yield item
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            if step is not None and not step.done():
+                # A generator cannot be closed while it is running; close it after this step
+                step.add_done_callback(lambda _: close())
+            else:
+                close()
@@ -0,0 +1,127 @@
+import datetime
+import os
+import re
+import threading
+import time
+import uuid
+from pathlib import Path
+
+_SAFE_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]*$")
+
+
+class ArtifactStore:
+    """Owns the audio/text artifacts written under one directory.
+
+    Every artifact gets a collision-free name, its size and creation time are
+    tracked in an in-memory index, and a background sweeper removes files
+    older than ``ttl_sec`` and then the oldest files until the directory is
+    back under ``quota_bytes``.
+    """
+
+    def __init__(self, root: Path, ttl_sec: float = 3600, quota_bytes: int = 500 * 1024 * 1024,
+                 sweep_interval_sec: float = 60):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.ttl_sec = ttl_sec
+        self.quota_bytes = quota_bytes
+        self.sweep_interval_sec = sweep_interval_sec
+        self.evicted = 0
+
+        self._index = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+
+        self._reconcile()
+        threading.Thread(target=self._sweep_loop, name="artifact-sweeper", daemon=True).start()
+
+    def new_path(self, kind: str, suffix: str) -> Path:
+        """Reserve a unique path such as ``speech_20250618_014300_3f9a0c1b2d4e.wav``"""
+        ts = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        return self.root / f"{kind}_{ts}_{uuid.uuid4().hex[:12]}{suffix}"
+
+    def add(self, path: Path) -> Path:
+        """Record a file that has just been written into the store"""
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            return path
+        with self._lock:
+            old = self._index.get(path.name)
+            self._bytes += size - (old[0] if old else 0)
+            self._index[path.name] = (size, old[1] if old else time.time())
+            over_quota = self._bytes > self.quota_bytes
+        if over_quota:
+            self._wake.set()
+        return path
+
+    def lookup(self, name: str) -> Path | None:
+        """Resolve a public file name to a stored artifact, or None"""
+        if not _SAFE_NAME.match(name):
+            return None
+        path = self.root / name
+        with self._lock:
+            known = name in self._index
+        if known and path.is_file():
+            return path
+        if path.is_file():
+            return self.add(path)
+        return None
+
+    def _reconcile(self):
+        """Sync the index with the directory (files written by others, files removed)"""
+        seen = {}
+        for entry in os.scandir(self.root):
+            if entry.is_file():
+                st = entry.stat()
+                seen[entry.name] = (st.st_size, st.st_mtime)
+        with self._lock:
+            for name, (size, mtime) in seen.items():
+                if name not in self._index:
+                    self._index[name] = (size, mtime)
+                else:
+                    self._index[name] = (size, self._index[name][1])
+            for name in list(self._index):
+                if name not in seen:
+                    del self._index[name]
+            self._bytes = sum(size for size, _ in self._index.values())
+
+    def sweep(self):
+        """Evict expired artifacts, then the oldest ones until under quota"""
+        self._reconcile()
+        now = time.time()
+        with self._lock:
+            by_age = sorted(self._index.items(), key=lambda item: item[1][1])
+            victims = []
+            total = self._bytes
+            for name, (size, created) in by_age:
+                if now - created > self.ttl_sec or total > self.quota_bytes:
+                    victims.append(name)
+                    total -= size
+                else:
+                    break
+            for name in victims:
+                self._bytes -= self._index.pop(name)[0]
+
+        for name in victims:
+            (self.root / name).unlink(missing_ok=True)
+        self.evicted += len(victims)
+
+    def _sweep_loop(self):
+        while True:
+            self._wake.wait(self.sweep_interval_sec)
+            self._wake.clear()
+            try:
+                self.sweep()
+            except OSError as e:
+                print(f"⚠  Artifact sweep failed: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "files": len(self._index),
+                "bytes": self._bytes,
+                "quota_bytes": self.quota_bytes,
+                "ttl_sec": self.ttl_sec,
+                "evicted": self.evicted,
+            }
@@ -8,16 +8,113 @@ class Config:
     FRAME_MS: int = 20
     CHANNELS: int = 1
     VAD_MODE: int = 2
+
+    # Capture buffer
+    CAPTURE_PREROLL_MS: int = 300
+    MAX_UTTERANCE_SEC: float = 30.0
     
     # Silence detection
     END_SILENCE_SEC: float = 2.0
     ANS_SILENCE_SEC: float = 1.5
+
+    # Adaptive endpointing: the silence timeouts above become ceilings and the
+    # turn ends after a hold learned from the speaker's own pauses, never
+    # shorter than ENDPOINT_MIN_SILENCE_MS. With ENDPOINT_PROBE, a quick
+    # transcript of the audio so far (after ENDPOINT_PROBE_AFTER_MS of
+    # silence) decides between a finished sentence and a hesitation.
+    ADAPTIVE_ENDPOINTING: bool = True
+    ENDPOINT_MIN_SILENCE_MS: int = 300
+    ENDPOINT_DEFAULT_SILENCE_MS: int = 800
+    ENDPOINT_PROBE: bool = True
+    ENDPOINT_PROBE_AFTER_MS: int = 250
+
+    # Speculative turns (needs ADAPTIVE_ENDPOINTING): at each pause the audio
+    # so far is transcribed in the background and reused if the pause ends
+    # the turn; SPECULATIVE_LLM also requests the reply early, which costs
+    # a discarded GPT call whenever the user carries on talking
+    SPECULATIVE_TRANSCRIBE: bool = True
+    SPECULATIVE_LLM: bool = False
+
+    # VAD trimming before transcription (pauses longer than VAD_MAX_PAUSE_MS
+    # shrink to twice the padding)
+    VAD_TRIM: bool = True
+    VAD_TRIM_PAD_MS: int = 300
+    VAD_MAX_PAUSE_MS: int = 1000
+
+    # Barge-in: keep listening while a reply plays and stop playback once the
+    # user has spoken for BARGE_IN_MS (needs headphones, there is no echo cancellation)
+    BARGE_IN: bool = False
+    BARGE_IN_MS: int = 100
+
+    # Yes/no fast path for the continuation prompt
+    YES_NO_MAX_SEC: float = 3.0
+    YES_NO_MIN_CONFIDENCE: float = 0.6
     
     # AI models
     WHISPER_MODEL: str = "tiny.en"
     GPT_MODEL: str = "gpt-4"
+
+    # GPT response cache (size 0 disables it, fuzzy threshold 0 keeps it exact-match only)
+    RESPONSE_CACHE_SIZE: int = 512
+    RESPONSE_CACHE_TTL_SEC: int = 86400
+    RESPONSE_CACHE_FUZZY_THRESHOLD: float = 0.0
+
+    # Conversation memory (older turns are folded into a summary past the budget)
+    HISTORY_TOKEN_BUDGET: int = 1500
+    SUMMARY_MAX_TOKENS: int = 200
+    MAX_SESSIONS: int = 1000
+
+    # Outbound HTTP for gTTS and OpenAI (keep-alive pools, retries with jittered
+    # backoff; hedging duplicates a request still running past the recent p95)
+    HTTP_POOL_SIZE: int = 16
+    HTTP_RETRIES: int = 2
+    HTTP_HEDGE: bool = False
+    LLM_TIMEOUT_SEC: float = 30.0
+    LLM_RETRIES: int = 2
+
+    # Whisper worker pool (0 cpu threads = split cores evenly between workers)
+    WHISPER_WORKERS: int = 1
+    WHISPER_CPU_THREADS: int = 0
+    WHISPER_QUEUE_SIZE: int = 8
+
+    # Micro-batching of short utterances (batch size 1 disables it)
+    TRANSCRIBE_BATCH_SIZE: int = 8
+    TRANSCRIBE_BATCH_WINDOW_MS: int = 20
     
-    # Output settings
+    # Output settings (artifacts older than the TTL or beyond the quota are evicted)
     OUT_DIR: Path = Path("audio")
+    ARTIFACT_TTL_SEC: int = 3600
+    ARTIFACT_QUOTA_BYTES: int = 500 * 1024 * 1024
+    ARTIFACT_SWEEP_SEC: int = 60
     TTS_LANG: str = "en"
-    GTTS_TIMEOUT_SEC: int = 5 
\ No newline at end of file
+    GTTS_TIMEOUT_SEC: int = 5
+    TTS_ENDPOINT: str = ""  # empty = Google; set to a local stand-in for benchmarks
+    ARCHIVE_RECORDINGS: bool = True
+
+    # Offline TTS fallback, rendered to WAV in worker processes (0 workers = half the cores)
+    OFFLINE_TTS_WORKERS: int = 0
+    OFFLINE_TTS_QUEUE_SIZE: int = 16
+    OFFLINE_TTS_TIMEOUT_SEC: float = 30.0
+
+    # TTS cache
+    TTS_CACHE_DIR: Path = Path("cache/tts")
+    TTS_CACHE_MAX_BYTES: int = 50 * 1024 * 1024
+    TTS_PREWARM: bool = True
+
+    # Upload ingestion: uploads are piped through ffmpeg (INGEST_DECODERS
+    # kept pre-spawned) straight to 16 kHz samples; longer than
+    # INGEST_MAX_SEC is rejected while decoding
+    INGEST_MAX_SEC: float = 60.0
+    INGEST_DECODERS: int = 2
+    INGEST_TIMEOUT_SEC: float = 30.0
+
+    # Streaming replies
+    STREAM_TTS: bool = True
+    STREAM_MIN_CHARS: int = 40 
+    # Chunked audio responses (/api/tts-stream, /api/stream-reply) also keep
+    # a copy of the MP3 in the artifact store (per request: ?archive=1)
+    TTS_STREAM_ARCHIVE: bool = False
+
+    # Live audio over WebSocket (/ws/live): partial transcripts every
+    # LIVE_PARTIAL_MS while the user speaks
+    LIVE_PARTIAL_MS: int = 1000
\ No newline at end of file
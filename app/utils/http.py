@@ -0,0 +1,167 @@
+import asyncio
+import random
+import threading
+import time
+import urllib.request
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Worth another attempt: rate limiting, timeouts and transient server errors
+RETRY_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+
+class LatencyTracker:
+    """Sliding window of recent call latencies; its high quantile is the hedge delay"""
+
+    def __init__(self, window: int = 200, quantile: float = 0.95, min_samples: int = 20):
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def hedge_delay(self) -> float | None:
+        """Latency below which most calls finish, or None until enough calls were seen"""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * self.quantile))]
+
+
+def backoff(attempt: int, base_sec: float, cap_sec: float = 2.0) -> float:
+    """Exponential backoff with full jitter, so retries from many threads don't synchronise"""
+    return random.uniform(0, min(cap_sec, base_sec * 2 ** attempt))
+
+
+def _timed(fn, tracker: LatencyTracker):
+    start = time.monotonic()
+    result = fn()
+    tracker.record(time.monotonic() - start)
+    return result
+
+
+def hedged_call(fn, tracker: LatencyTracker, executor: ThreadPoolExecutor):
+    """Call ``fn()``; if it is still running after the tracker's hedge delay, race a duplicate.
+
+    The first successful result wins. The losing call cannot be cancelled and
+    finishes in the background, so only hedge idempotent requests.
+    """
+    delay = tracker.hedge_delay()
+    if delay is None:
+        return _timed(fn, tracker)
+    primary = executor.submit(_timed, fn, tracker)
+    try:
+        return primary.result(timeout=delay)
+    except FutureTimeout:
+        pass
+
+    pending = {primary, executor.submit(_timed, fn, tracker)}
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+            error = future.exception()
+    raise error
+
+
+async def _timed_async(fn, tracker: LatencyTracker):
+    start = time.monotonic()
+    result = await fn()
+    tracker.record(time.monotonic() - start)
+    return result
+
+
+async def hedged_call_async(fn, tracker: LatencyTracker):
+    """Async counterpart of hedged_call; ``fn`` returns a fresh awaitable and the loser is cancelled"""
+    delay = tracker.hedge_delay()
+    primary = asyncio.ensure_future(_timed_async(fn, tracker))
+    if delay is None:
+        return await primary
+    done, _ = await asyncio.wait({primary}, timeout=delay)
+    if done:
+        return primary.result()
+
+    pending = {primary, asyncio.ensure_future(_timed_async(fn, tracker))}
+    error = None
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if task.exception() is None:
+                for other in pending:
+                    other.cancel()
+                return task.result()
+            error = task.exception()
+    raise error
+
+
+class HttpClient:
+    """Outbound HTTP shared by every thread: keep-alive pools, deadlines, retries, hedging.
+
+    Each ``send`` gets one deadline covering all of its attempts. Connection
+    errors, timeouts and retryable statuses are retried with jittered backoff
+    while time remains, and with ``hedge`` on, an attempt still running past
+    the recent p95 latency is raced against a duplicate.
+    """
+
+    def __init__(self, pool_size: int = 16, timeout_sec: float = 5.0, retries: int = 2,
+                 backoff_sec: float = 0.2, hedge: bool = False):
+        self.timeout_sec = timeout_sec
+        self.retries = retries
+        self.backoff_sec = backoff_sec
+        self.hedge = hedge
+        self.sent = 0
+        self.retried = 0
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.proxies = urllib.request.getproxies()
+        self.latency = LatencyTracker()
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="http-hedge") if hedge else None
+
+    def _attempt(self, request: requests.PreparedRequest, timeout_sec: float, kwargs: dict) -> requests.Response:
+        def send():
+            return self.session.send(request.copy(), timeout=timeout_sec, proxies=self.proxies, **kwargs)
+
+        self.sent += 1
+        if self._executor is not None:
+            return hedged_call(send, self.latency, self._executor)
+        return _timed(send, self.latency)
+
+    def send(self, request: requests.PreparedRequest, timeout_sec: float = None, **kwargs) -> requests.Response:
+        """Send a prepared request, retrying until it succeeds, fails for good or the deadline passes"""
+        deadline = time.monotonic() + (timeout_sec or self.timeout_sec)
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise requests.Timeout(f"Deadline exceeded after {attempt} attempt(s)")
+            try:
+                response = self._attempt(request, remaining, kwargs)
+                if response.status_code not in RETRY_STATUSES or attempt >= self.retries:
+                    return response
+                response.close()
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.retries:
+                    raise
+            attempt += 1
+            self.retried += 1
+            time.sleep(min(backoff(attempt - 1, self.backoff_sec), max(0.0, deadline - time.monotonic())))
+
+    def stats(self) -> dict:
+        return {
+            "sent": self.sent,
+            "retried": self.retried,
+            "hedge": self.hedge,
+            "hedge_delay_sec": self.latency.hedge_delay(),
+        }
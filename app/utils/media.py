@@ -0,0 +1,176 @@
+import mimetypes
+import mmap
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Iterator
+
+AUDIO_MIMETYPES = {
+    ".mp3": "audio/mpeg",
+    ".wav": "audio/wav",
+    ".ogg": "audio/ogg",
+    ".opus": "audio/ogg",
+    ".oga": "audio/ogg",
+    ".webm": "audio/webm",
+    ".m4a": "audio/mp4",
+    ".flac": "audio/flac",
+    ".txt": "text/plain; charset=utf-8",
+}
+
+CHUNK_SIZE = 256 * 1024
+
+
+def detect_mimetype(path: Path) -> str:
+    """MIME type from the file extension, with explicit entries for audio formats"""
+    mimetype = AUDIO_MIMETYPES.get(path.suffix.lower())
+    if mimetype is None:
+        mimetype, _ = mimetypes.guess_type(path.name)
+    return mimetype or "application/octet-stream"
+
+
+def make_etag(st: os.stat_result) -> str:
+    """Strong validator from inode, size and mtime (files are never modified in place)"""
+    return f'"{st.st_ino:x}-{st.st_size:x}-{st.st_mtime_ns:x}"'
+
+
+def http_date(timestamp: float) -> str:
+    return formatdate(timestamp, usegmt=True)
+
+
+def etag_matches(header: str | None, etag: str) -> bool:
+    """Weak comparison used for If-None-Match"""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    tags = [t.strip().removeprefix("W/") for t in header.split(",")]
+    return etag in tags
+
+
+def not_modified(headers, etag: str, mtime: float) -> bool:
+    """Evaluate If-None-Match / If-Modified-Since (RFC 9110 §13.2.2 order)"""
+    if_none_match = headers.get("If-None-Match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+    if_modified_since = headers.get("If-Modified-Since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def if_range_allows(headers, etag: str, mtime: float) -> bool:
+    """Whether a Range header may be honoured given If-Range"""
+    if_range = headers.get("If-Range")
+    if not if_range:
+        return True
+    if_range = if_range.strip()
+    if if_range.startswith('"'):
+        return if_range == etag
+    try:
+        return int(mtime) <= parsedate_to_datetime(if_range).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+def parse_range(header: str | None, size: int) -> list[tuple[int, int]] | None:
+    """Parse a ``Range: bytes=...`` header into inclusive (start, end) pairs.
+
+    Supports ``a-b``, open-ended ``a-`` and suffix ``-n`` forms, comma separated.
+    Returns None when the header is absent or malformed (serve the whole file)
+    and an empty list when no range is satisfiable (416).
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec.strip():
+        return None
+
+    ranges = []
+    for part in spec.split(","):
+        first, sep, last = part.strip().partition("-")
+        if not sep:
+            return None
+        try:
+            if first == "":
+                length = int(last)
+                if length <= 0 or size == 0:
+                    continue
+                ranges.append((max(0, size - length), size - 1))
+                continue
+            start = int(first)
+            end = int(last) if last else size - 1
+        except ValueError:
+            return None
+        if last and start > end:
+            return None
+        if start >= size:
+            continue
+        ranges.append((start, min(end, size - 1)))
+    return ranges
+
+
+class FileRange:
+    """File-like view of bytes [start, end] of an open file.
+
+    Passed to ``wsgi.file_wrapper``: servers that implement sendfile (e.g.
+    gunicorn) send from the current offset bounded by Content-Length via
+    ``os.sendfile``; others fall back to ``read`` which stops at ``end``.
+    """
+
+    def __init__(self, f, start: int, end: int):
+        self.f = f
+        self.f.seek(start)
+        self.remaining = end - start + 1
+
+    def read(self, size: int = -1) -> bytes:
+        if self.remaining <= 0:
+            return b""
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.f.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self) -> int:
+        return self.f.fileno()
+
+    def tell(self) -> int:
+        return self.f.tell()
+
+    def close(self):
+        self.f.close()
+
+
+def mmap_chunks(mm: mmap.mmap, start: int, end: int, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield bytes [start, end] of a memory-mapped file in bounded chunks"""
+    for offset in range(start, end + 1, chunk_size):
+        yield mm[offset:min(offset + chunk_size, end + 1)]
+
+
+def multipart_byteranges(path: Path, ranges: list[tuple[int, int]], size: int,
+                         mimetype: str, boundary: str) -> tuple[Iterator[bytes], int]:
+    """Body iterator and Content-Length for a multipart/byteranges response"""
+    parts = []
+    length = 0
+    for start, end in ranges:
+        head = (
+            f"\r\n--{boundary}\r\n"
+            f"Content-Type: {mimetype}\r\n"
+            f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n"
+        ).encode("ascii")
+        parts.append((head, start, end))
+        length += len(head) + end - start + 1
+    tail = f"\r\n--{boundary}--\r\n".encode("ascii")
+    length += len(tail)
+
+    def body():
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for head, start, end in parts:
+                yield head
+                yield from mmap_chunks(mm, start, end)
+        yield tail
+
+    return body(), length
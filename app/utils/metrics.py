@@ -0,0 +1,185 @@
+import bisect
+import contextvars
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable
+
+# Seconds, from a VAD frame decision up to a long LLM reply
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+RTF_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 5.0)
+
+
+def _format(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+
+class Trace:
+    """Stage timings of one request, collected through a context variable"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = []
+
+    def mark(self, stage: str, seconds: float):
+        self.stages.append((stage, seconds))
+
+    def as_dict(self) -> dict:
+        return {
+            "stages": [{"stage": stage, "seconds": round(seconds, 4)} for stage, seconds in self.stages],
+            "total_sec": round(time.perf_counter() - self.started, 4),
+        }
+
+
+_trace = contextvars.ContextVar("trace", default=None)
+
+
+def start_trace(trace: Trace = None) -> Trace:
+    """Begin a trace for the current request; metrics observed in this context are added to it.
+
+    Passing an existing trace continues it, e.g. inside a streamed response body.
+    """
+    trace = trace or Trace()
+    _trace.set(trace)
+    return trace
+
+
+def current_trace() -> Trace | None:
+    return _trace.get()
+
+
+class Counter:
+    TYPE = "counter"
+
+    def __init__(self, name: str, help: str, registry: "Registry" = None):
+        self.name = name
+        self.help = help
+        self.value = 0.0
+        self._lock = threading.Lock()
+        (registry or REGISTRY).register(self)
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def samples(self):
+        yield self.name, self.value
+
+
+class Gauge:
+    """Current value, either set directly or read from ``fn`` at scrape time"""
+    TYPE = "gauge"
+
+    def __init__(self, name: str, help: str, fn: Callable[[], float] = None, registry: "Registry" = None):
+        self.name = name
+        self.help = help
+        self.fn = fn
+        self.value = 0.0
+        (registry or REGISTRY).register(self)
+
+    def set(self, value: float):
+        self.value = value
+
+    def samples(self):
+        yield self.name, self.fn() if self.fn is not None else self.value
+
+
+class Histogram:
+    """Cumulative-bucket histogram; ``stage`` names the observation in request traces"""
+    TYPE = "histogram"
+
+    def __init__(self, name: str, help: str, buckets=DEFAULT_BUCKETS, stage: str = None, registry: "Registry" = None):
+        self.name = name
+        self.help = help
+        self.stage = stage
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+        (registry or REGISTRY).register(self)
+
+    def observe(self, value: float):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.sum += value
+            self.count += 1
+        trace = _trace.get()
+        if trace is not None and self.stage:
+            trace.mark(self.stage, value)
+
+    @contextmanager
+    def time(self):
+        """Observe the wall time of the block (also when it raises)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def samples(self):
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        cumulative = 0
+        for bound, n in zip(self.buckets + (math.inf,), counts):
+            cumulative += n
+            yield f'{self.name}_bucket{{le="{_format(bound)}"}}', cumulative
+        yield f"{self.name}_sum", total
+        yield f"{self.name}_count", count
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """Add a metric; registering a name again replaces the previous metric"""
+        with self._lock:
+            self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            try:
+                samples = list(metric.samples())
+            except Exception:
+                # A collector whose source is gone must not break the scrape
+                continue
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.TYPE}")
+            lines.extend(f"{name} {_format(value)}" for name, value in samples)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Per-stage latency of a voice turn
+CAPTURE_SECONDS = Histogram("voice_capture_seconds", "Microphone capture of one utterance", stage="capture")
+VAD_SECONDS = Histogram("voice_vad_seconds", "VAD decisions and silence trimming per utterance", stage="vad")
+DECODE_SECONDS = Histogram("voice_decode_seconds", "Decoding an uploaded file to 16 kHz samples", stage="decode")
+WAV_WRITE_SECONDS = Histogram("voice_wav_write_seconds", "Writing a recording to WAV", stage="wav_write")
+TRANSCRIBE_SECONDS = Histogram("voice_transcribe_seconds", "Whisper wall time per transcription", stage="transcribe")
+TRANSCRIBE_AUDIO_SECONDS = Histogram("voice_transcribe_audio_seconds", "Duration of transcribed audio")
+TRANSCRIBE_RTF = Histogram("voice_transcribe_rtf", "Transcription real-time factor (wall / audio seconds)", buckets=RTF_BUCKETS)
+LLM_TTFT_SECONDS = Histogram("voice_llm_ttft_seconds", "Time to the first streamed LLM token", stage="llm_ttft")
+LLM_SECONDS = Histogram("voice_llm_seconds", "Total LLM request time", stage="llm")
+TTS_FIRST_CHUNK_SECONDS = Histogram("voice_tts_first_chunk_seconds", "Streamed TTS: time to the first audio bytes", stage="tts_first_chunk")
+TTS_SECONDS = Histogram("voice_tts_seconds", "TTS synthesis per text", stage="tts")
+ENDPOINT_SILENCE_SECONDS = Histogram("voice_endpoint_silence_seconds", "Trailing silence waited before ending a turn")
+PLAYBACK_SECONDS = Histogram("voice_playback_seconds", "Local playback of synthesized speech", stage="playback")
+
+
+def observe_transcription(audio_sec: float | None, wall_sec: float):
+    """Record a transcription's wall time and, when the audio length is known, its RTF"""
+    TRANSCRIBE_SECONDS.observe(wall_sec)
+    if audio_sec:
+        TRANSCRIBE_AUDIO_SECONDS.observe(audio_sec)
+        TRANSCRIBE_RTF.observe(wall_sec / audio_sec)
@@ -0,0 +1,72 @@
+import re
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator
+
+# Sentence-ending punctuation (optionally followed by closing quotes/brackets)
+# and whitespace, or a line break. Requiring trailing whitespace keeps things
+# like "3.14" or "v1.2" from being split while tokens are still arriving.
+_BOUNDARY = re.compile(r"[.!?…]+[\"')\]]*\s+|\n\s*")
+
+# Words a speaker trails off on when they are about to go on
+_CONTINUATION_WORDS = frozenset({
+    "and", "but", "or", "so", "because", "if", "then", "the", "a", "an", "to", "of",
+    "with", "for", "um", "uh", "like", "which", "that", "is", "my", "our",
+})
+
+
+def looks_complete(text: str) -> bool:
+    """Heuristic: does a partial transcript read like a finished turn?"""
+    text = text.strip()
+    if not text:
+        return False
+    words = re.findall(r"[\w']+", text.lower())
+    if words and words[-1] in _CONTINUATION_WORDS:
+        return False
+    return text[-1] in ".!?…" and not text.endswith("...")
+
+
+class SentenceChunker:
+    """Accumulates streamed text tokens and releases complete sentences.
+
+    Sentences shorter than ``min_chars`` are merged with the following one so
+    that TTS is not called for every tiny fragment.
+    """
+
+    def __init__(self, min_chars: int = 40):
+        self.min_chars = min_chars
+        self.buf = ""
+
+    def feed(self, token: str) -> list[str]:
+        """Add a token and return any sentences it completed"""
+        self.buf += token
+        sentences, cut = [], 0
+        for match in _BOUNDARY.finditer(self.buf):
+            if match.end() - cut >= self.min_chars:
+                sentence = self.buf[cut:match.end()].strip()
+                if sentence:
+                    sentences.append(sentence)
+                cut = match.end()
+        self.buf = self.buf[cut:]
+        return sentences
+
+    def flush(self) -> list[str]:
+        """Return whatever is left once the token stream has ended"""
+        tail, self.buf = self.buf.strip(), ""
+        return [tail] if tail else []
+
+
+def iter_sentences(tokens: Iterable[str], min_chars: int = 40) -> Iterator[str]:
+    """Group a stream of text tokens into sentences as soon as they complete"""
+    chunker = SentenceChunker(min_chars)
+    for token in tokens:
+        yield from chunker.feed(token)
+    yield from chunker.flush()
+
+
+async def aiter_sentences(tokens: AsyncIterable[str], min_chars: int = 40) -> AsyncIterator[str]:
+    """Async counterpart of :func:`iter_sentences`"""
+    chunker = SentenceChunker(min_chars)
+    async for token in tokens:
+        for sentence in chunker.feed(token):
+            yield sentence
+    for sentence in chunker.flush():
+        yield sentence
@@ -1,50 +1,310 @@
-import datetime
+import asyncio
+import contextvars
+import itertools
+import queue
 import re
+import threading
+import time
+import uuid
+from contextlib import aclosing, closing
 from pathlib import Path
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator
+import numpy as np
 #Fixed
 from speech.audio_handler import AudioHandler
-from ai.ai_handler import AIHandler
+from speech.endpointing import Endpointer
+from speech.ingest import AudioDecoderPool
+from speech.tts_cache import TTSCache
+from speech.tts_renderer import OfflineTTSRenderer
+from speech.vad import trim_silence
+from ai.ai_handler import AIHandler, Segment
+from ai.speculation import SpeculativeTurn, Speculator
+from utils.aio import step_in_executor
+from utils.artifact_store import ArtifactStore
 from utils.config import Config
+from utils.http import HttpClient
+from utils.metrics import Gauge
+from utils.text import aiter_sentences, iter_sentences, looks_complete
+
+CONTINUE_PROMPT = "Would you like to continue the chat? Please say Yes or No."
+GOODBYE_PROMPT = "Good-bye!"
+# Audio the endpoint probe transcribes: the end of the sentence is what matters
+ENDPOINT_PROBE_SEC = 5
+
 
 class VoiceAssistant:
+    """Wires capture, transcription, GPT and TTS together.
+
+    The audio and AI handlers are built on first use, so constructing the
+    assistant (e.g. when run.py is imported) is cheap; ``start_warm_up``
+    loads the models in the background and ``ready`` reports when done.
+    """
+
     def __init__(self, config: Config = None):
         self.config = config or Config()
-        self.audio_handler = AudioHandler(
+        self.http = HttpClient(
+            pool_size=self.config.HTTP_POOL_SIZE,
+            timeout_sec=self.config.GTTS_TIMEOUT_SEC,
+            retries=self.config.HTTP_RETRIES,
+            hedge=self.config.HTTP_HEDGE
+        )
+        self.artifacts = ArtifactStore(
+            self.config.OUT_DIR,
+            ttl_sec=self.config.ARTIFACT_TTL_SEC,
+            quota_bytes=self.config.ARTIFACT_QUOTA_BYTES,
+            sweep_interval_sec=self.config.ARTIFACT_SWEEP_SEC
+        )
+        self.ingest = AudioDecoderPool(
+            sample_rate=self.config.SAMPLE_RATE,
+            max_sec=self.config.INGEST_MAX_SEC,
+            pool_size=self.config.INGEST_DECODERS,
+            timeout_sec=self.config.INGEST_TIMEOUT_SEC
+        )
+        self.round_no = 1
+        self.session_id = f"local-{uuid.uuid4().hex[:8]}"
+
+        self.ready = threading.Event()
+        self.warm_up_error = None
+        self._audio_handler = None
+        self._ai_handler = None
+        self._warm_up_thread = None
+        self._init_lock = threading.Lock()
+
+        self.speculator = self.build_speculator(self.session_id)
+
+        Gauge("voice_http_retries", "Outbound HTTP retries since start", lambda: self.http.retried)
+        Gauge("voice_artifact_bytes", "Bytes held in the artifact store", lambda: self.artifacts.stats()["bytes"])
+
+    @property
+    def audio_handler(self) -> AudioHandler:
+        if self._audio_handler is None:
+            with self._init_lock:
+                if self._audio_handler is None:
+                    self._audio_handler = self._build_audio_handler()
+        return self._audio_handler
+
+    @property
+    def ai_handler(self) -> AIHandler:
+        if self._ai_handler is None:
+            with self._init_lock:
+                if self._ai_handler is None:
+                    self._ai_handler = self._build_ai_handler()
+        return self._ai_handler
+
+    def _build_audio_handler(self) -> AudioHandler:
+        handler = AudioHandler(
             sample_rate=self.config.SAMPLE_RATE,
             frame_ms=self.config.FRAME_MS,
             channels=self.config.CHANNELS,
-            vad_mode=self.config.VAD_MODE
+            vad_mode=self.config.VAD_MODE,
+            tts_cache=TTSCache(self.config.TTS_CACHE_DIR, self.config.TTS_CACHE_MAX_BYTES),
+            preroll_ms=self.config.CAPTURE_PREROLL_MS,
+            max_utterance_sec=self.config.MAX_UTTERANCE_SEC,
+            trim_silence=self.config.VAD_TRIM,
+            trim_pad_ms=self.config.VAD_TRIM_PAD_MS,
+            max_pause_ms=self.config.VAD_MAX_PAUSE_MS,
+            http=self.http,
+            gtts_timeout_sec=self.config.GTTS_TIMEOUT_SEC,
+            tts_endpoint=self.config.TTS_ENDPOINT,
+            renderer=OfflineTTSRenderer(
+                workers=self.config.OFFLINE_TTS_WORKERS,
+                queue_size=self.config.OFFLINE_TTS_QUEUE_SIZE,
+                timeout_sec=self.config.OFFLINE_TTS_TIMEOUT_SEC
+            ),
+            endpointer=self.build_endpointer(self.speculator)
         )
-        self.ai_handler = AIHandler(
+        Gauge("voice_tts_cache_hit_rate", "TTS cache hit rate",
+              lambda: handler.tts_cache.hits / max(1, handler.tts_cache.hits + handler.tts_cache.misses))
+        if self.config.TTS_PREWARM:
+            threading.Thread(
+                target=handler.prewarm, args=([CONTINUE_PROMPT, GOODBYE_PROMPT],), daemon=True
+            ).start()
+        return handler
+
+    def build_speculator(self, session_id: str = None) -> Speculator | None:
+        """Speculative transcription (and reply prefetch) for one speaker, if enabled"""
+        if not (self.config.ADAPTIVE_ENDPOINTING and self.config.SPECULATIVE_TRANSCRIBE):
+            return None
+
+        def respond(text: str) -> str:
+            # Not recorded in the session until the turn is adopted
+            return self.ai_handler.get_gpt_response(text, session_id, record=False)
+
+        return Speculator(
+            transcribe=lambda pcm: self.ai_handler.transcribe_audio(AudioHandler.pcm_to_float32(pcm)),
+            respond=respond if self.config.SPECULATIVE_LLM else None,
+            finished=looks_complete if self.config.ENDPOINT_PROBE else None
+        )
+
+    def build_endpointer(self, speculator: Speculator = None) -> Endpointer | None:
+        """Adaptive endpointer for one speaker (pause statistics are per speaker), if enabled"""
+        if not self.config.ADAPTIVE_ENDPOINTING:
+            return None
+        if speculator is not None:
+            # The speculative transcript doubles as the end-of-sentence probe
+            probe = dict(probe=speculator, verdict=speculator.verdict, on_discard=speculator.discard)
+        else:
+            probe = dict(probe=self._sounds_finished if self.config.ENDPOINT_PROBE else None)
+        return Endpointer(
+            frame_ms=self.config.FRAME_MS,
+            min_silence_ms=self.config.ENDPOINT_MIN_SILENCE_MS,
+            default_silence_ms=self.config.ENDPOINT_DEFAULT_SILENCE_MS,
+            probe_after_ms=self.config.ENDPOINT_PROBE_AFTER_MS,
+            trim=self.trim_utterance if self.config.VAD_TRIM else None,
+            **probe
+        )
+
+    def trim_utterance(self, pcm: np.ndarray, flags: np.ndarray) -> np.ndarray:
+        """Trim silence from captured PCM the way it is before transcription (VAD_TRIM_* settings)"""
+        config = self.config
+        return trim_silence(pcm, flags, config.SAMPLE_RATE * config.FRAME_MS // 1000,
+                            config.VAD_TRIM_PAD_MS // config.FRAME_MS, config.VAD_MAX_PAUSE_MS // config.FRAME_MS)
+
+    def _sounds_finished(self, pcm: np.ndarray) -> bool:
+        """Endpoint probe: transcribe the last few seconds and check for a finished sentence"""
+        tail = pcm[-ENDPOINT_PROBE_SEC * self.config.SAMPLE_RATE:]
+        text = self.ai_handler.transcribe_audio(AudioHandler.pcm_to_float32(tail))
+        return looks_complete(text)
+
+    def take_speculation(self) -> SpeculativeTurn | None:
+        """The speculative work for the utterance just recorded, if any"""
+        if self.speculator is None:
+            return None
+        endpointer = self.audio_handler.endpointer
+        return self.speculator.adopt(endpointer.take_probe() if endpointer is not None else None)
+
+    def _build_ai_handler(self) -> AIHandler:
+        ai = AIHandler(
             whisper_model=self.config.WHISPER_MODEL,
-            gpt_model=self.config.GPT_MODEL
+            gpt_model=self.config.GPT_MODEL,
+            whisper_workers=self.config.WHISPER_WORKERS,
+            whisper_cpu_threads=self.config.WHISPER_CPU_THREADS,
+            whisper_queue_size=self.config.WHISPER_QUEUE_SIZE,
+            batch_size=self.config.TRANSCRIBE_BATCH_SIZE,
+            batch_window_ms=self.config.TRANSCRIBE_BATCH_WINDOW_MS,
+            cache_size=self.config.RESPONSE_CACHE_SIZE,
+            cache_ttl_sec=self.config.RESPONSE_CACHE_TTL_SEC,
+            cache_fuzzy_threshold=self.config.RESPONSE_CACHE_FUZZY_THRESHOLD,
+            history_token_budget=self.config.HISTORY_TOKEN_BUDGET,
+            summary_max_tokens=self.config.SUMMARY_MAX_TOKENS,
+            max_sessions=self.config.MAX_SESSIONS,
+            llm_timeout_sec=self.config.LLM_TIMEOUT_SEC,
+            llm_retries=self.config.LLM_RETRIES,
+            http_pool_size=self.config.HTTP_POOL_SIZE,
+            llm_hedge=self.config.HTTP_HEDGE
         )
-        self.round_no = 1
+        Gauge("voice_whisper_queue_depth", "Jobs waiting for a Whisper worker", lambda: ai.whisper_pool.queue_depth)
+        if ai.batcher is not None:
+            Gauge("voice_batcher_queue_depth", "Utterances waiting for a batched decode", lambda: ai.batcher.queue_depth)
+        if ai.response_cache is not None:
+            Gauge("voice_response_cache_hit_rate", "GPT response cache hit rate", lambda: ai.response_cache.stats()["hit_rate"])
+        return ai
 
-    def transcribe_from_file(self, audio_path: Path) -> str:
+    def start_warm_up(self):
+        """Warm up in the background (once); ``ready`` is set when requests will be served at full speed"""
+        with self._init_lock:
+            if self._warm_up_thread is None:
+                self._warm_up_thread = threading.Thread(target=self.warm_up, name="warm-up", daemon=True)
+                self._warm_up_thread.start()
+
+    def warm_up(self):
+        """
+        Loads the Whisper replicas and runs a throwaway transcription through
+        each of them (and through the batcher), so the first real request does
+        not pay for model loading and buffer allocation.
+        """
+        try:
+            started = time.perf_counter()
+            silence = np.zeros(self.config.SAMPLE_RATE, dtype=np.float32)
+            self.ai_handler.whisper_pool.warm_up(silence)
+            self.ai_handler.transcribe_audio(silence)
+            self.audio_handler  # VAD, TTS cache and prompt prewarm
+            self.ingest.start()
+            self.ready.set()
+            print(f"🔥 Warm-up finished in {time.perf_counter() - started:.1f}s")
+        except Exception as e:
+            self.warm_up_error = e
+            print(f"⚠  Warm-up failed: {e}")
+
+    def decode_upload(self, chunks: Iterable[bytes]) -> np.ndarray:
+        """
+        Decodes an uploaded audio stream in memory, without saving it.
+
+        Args:
+            chunks (Iterable[bytes]): The upload body (webm/opus/ogg/mp3/wav/...)
+
+        Returns:
+            np.ndarray: 16 kHz mono float32 samples
+        """
+        return self.ingest.decode(chunks)
+
+    async def adecode_upload(self, chunks: AsyncIterable[bytes]) -> np.ndarray:
+        """Async counterpart of decode_upload for the ASGI server"""
+        return await self.ingest.decode_async(chunks)
+
+    def load_speech(self, audio: Path | np.ndarray) -> np.ndarray:
+        """
+        Decodes an audio file and trims its silence with the same VAD used for capture.
+
+        Args:
+            audio (Path | np.ndarray): Path to the audio file, or samples from decode_upload
+
+        Returns:
+            np.ndarray: 16 kHz mono float32 samples
+        """
+        if isinstance(audio, np.ndarray):
+            samples = audio
+        elif not audio.exists():
+            raise FileNotFoundError(f"Audio file does not exist: {audio}")
+        else:
+            samples = self.ai_handler.load_audio(audio)
+        if self.config.VAD_TRIM:
+            trimmed = self.audio_handler.trim_samples(samples)
+            print(f"✂  VAD trim: {len(samples) / self.config.SAMPLE_RATE:.1f}s → {len(trimmed) / self.config.SAMPLE_RATE:.1f}s")
+            samples = trimmed
+        return samples
+
+    def transcribe_from_file(self, audio_path: Path | np.ndarray) -> str:
         """
         Transcribes a WAV audio file using the integrated Whisper model.
 
         Args:
-            audio_path (Path): Path to the .wav audio file
+            audio_path (Path | np.ndarray): Path to the .wav audio file, or decoded samples
 
         Returns:
             str: Transcribed text
         """
-        if not audio_path.exists():
-            raise FileNotFoundError(f"Audio file does not exist: {audio_path}")
-
-        print(f"📥 Transcribing audio from file: {audio_path}")
-        transcript = self.ai_handler.transcribe_audio(audio_path)
+        if isinstance(audio_path, Path):
+            print(f"📥 Transcribing audio from file: {audio_path}")
+        transcript = self.ai_handler.transcribe_audio(self.load_speech(audio_path))
         print(f"📝 Transcription complete:\n{transcript}")
         return transcript
+
+    def transcribe_segments_from_file(self, audio_path: Path | np.ndarray) -> Iterator[Segment]:
+        """
+        Transcribes a WAV audio file, yielding segments as soon as they are decoded.
+
+        Args:
+            audio_path (Path | np.ndarray): Path to the .wav audio file, or decoded samples
+
+        Yields:
+            Segment: Whisper segment with ``start``, ``end`` and ``text``
+        """
+        if isinstance(audio_path, Path):
+            print(f"📥 Transcribing audio from file: {audio_path}")
+        parts = []
+        for segment in self.ai_handler.transcribe_segments(self.load_speech(audio_path)):
+            parts.append(segment.text)
+            yield segment
+        print(f"📝 Transcription complete:\n{''.join(parts).strip()}")
     
-    def process_text_with_gpt(self, text: str) -> str:
+    def process_text_with_gpt(self, text: str, session_id: str = None) -> str:
         """
         Processes input text using the GPT model.
 
         Args:
             text (str): User's transcribed input
+            session_id (str): Conversation to continue; None for a standalone question
 
         Returns:
             str: GPT-generated response
@@ -52,13 +312,13 @@ class VoiceAssistant:
         if not text.strip():
             raise ValueError("Input text is empty.")
         print(f"🧠 Sending to GPT: {text}")
-        response = self.ai_handler.get_gpt_response(text)
+        response = self.ai_handler.get_gpt_response(text, session_id)
         print(f"🤖 GPT Response: {response}")
         return response
     
     def text_to_speech(self, text: str) -> Path:
         """
-        Convert GPT response text to speech and save as MP3 or WAV.
+        Convert GPT response text to speech and save as MP3 or WAV, without playing it.
 
         Args:
             text (str): The text to synthesize
@@ -69,50 +329,336 @@ class VoiceAssistant:
         if not text.strip():
             raise ValueError("Cannot synthesize empty text.")
 
-        ts = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_path = self.config.OUT_DIR / f"response_{ts}.mp3"
-        self.audio_handler.speak(text, output_path)
-        return output_path
+        output_path = self.audio_handler.synthesize(text, self.artifacts.new_path("response", ".mp3"))
+        if output_path is None:
+            raise Exception("Text-to-speech failed: neither gTTS nor offline TTS produced audio")
+        return self.artifacts.add(output_path)
     
-    def process_user_input(self, pcm: bytes) -> tuple[str, Path]:
-        """Process user's audio input and return transcript and file path"""
-        if not pcm:
+    def stream_reply(self, text: str, session_id: str = None, reply: str = None) -> Iterator[tuple[str, Path | None]]:
+        """
+        Streams the GPT reply and synthesizes it sentence by sentence.
+
+        Tokens are consumed on a background thread so that GPT keeps generating
+        while earlier sentences are being synthesized.
+
+        Args:
+            text (str): User's transcribed input
+            session_id (str): Conversation to continue; None for a standalone question
+            reply (str): Reply fetched already (e.g. speculatively); only synthesized
+
+        Yields:
+            tuple[str, Path | None]: Each sentence and its audio file (None if TTS failed)
+        """
+        with closing(self._reply_sentences(text, session_id, reply)) as sentences:
+            for index, sentence in enumerate(sentences):
+                output_path = self.audio_handler.synthesize(sentence, self.artifacts.new_path("response", ".mp3"))
+                if output_path is not None:
+                    self.artifacts.add(output_path)
+                print(f"🔊 Chunk {index}: {sentence}")
+                yield sentence, output_path
+
+    def _reply_sentences(self, text: str, session_id: str = None, reply: str = None) -> Iterator[str]:
+        """The GPT reply split into sentences, with tokens consumed on a background thread.
+
+        Closing the iterator early (barge-in, client gone) stops the producer,
+        which closes the GPT request so the unheard reply is not recorded.
+        """
+        if not text.strip():
+            raise ValueError("Input text is empty.")
+        print(f"🧠 Streaming from GPT: {text}")
+
+        sentences = queue.Queue()
+        cancel = threading.Event()
+
+        def produce():
+            tokens = [reply] if reply is not None else self.ai_handler.stream_gpt_response(text, session_id)
+            try:
+                for sentence in iter_sentences(itertools.takewhile(lambda _: not cancel.is_set(), tokens),
+                                               self.config.STREAM_MIN_CHARS):
+                    sentences.put(sentence)
+                sentences.put(None)
+            except Exception as e:
+                sentences.put(e)
+            finally:
+                if hasattr(tokens, "close"):
+                    tokens.close()
+
+        # Run the producer in a copy of this context so its LLM timings land in the request trace
+        threading.Thread(target=contextvars.copy_context().run, args=(produce,), daemon=True).start()
+
+        try:
+            while True:
+                item = sentences.get()
+                if item is None:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            cancel.set()
+
+    def stream_speech(self, text: str, archive: bool = False) -> Iterator[bytes]:
+        """
+        Streams the MP3 for a text as it is synthesized, instead of writing it first.
+
+        Args:
+            text (str): Text to speak
+            archive (bool): Also keep the MP3 in the artifact store
+
+        Yields:
+            bytes: MP3 data (frames concatenate, so chunks can be played as they arrive)
+        """
+        if not text.strip():
+            raise ValueError("Cannot synthesize empty text.")
+        tee_path = self.artifacts.new_path("response", ".mp3") if archive else None
+        yield from self.audio_handler.stream_tts(text, tee_path)
+        if tee_path is not None:
+            self.artifacts.add(tee_path)
+
+    def stream_reply_audio(self, text: str, session_id: str = None, archive: bool = False) -> Iterator[bytes]:
+        """
+        Streams the spoken GPT reply as one MP3 stream, sentence by sentence.
+
+        Args:
+            text (str): User's transcribed input
+            session_id (str): Conversation to continue; None for a standalone question
+            archive (bool): Also keep each sentence's MP3 in the artifact store
+
+        Yields:
+            bytes: MP3 data. A TTS failure before the first chunk is raised (so the
+            request can fail); after that, a sentence whose synthesis fails is left out
+        """
+        produced = False
+        for index, sentence in enumerate(self._reply_sentences(text, session_id)):
+            print(f"🔊 Chunk {index}: {sentence}")
+            try:
+                for chunk in self.stream_speech(sentence, archive):
+                    produced = True
+                    yield chunk
+            except Exception as e:
+                if not produced:
+                    raise
+                print(f"⚠  TTS failed for chunk {index}: {e}")
+
+    async def astream_reply(self, text: str, session_id: str = None) -> AsyncIterator[tuple[str, Path | None]]:
+        """
+        Async counterpart of stream_reply for the ASGI server.
+
+        Tokens come from the async OpenAI client on the event loop; gTTS runs
+        on the default executor so other sessions are never blocked.
+
+        Args:
+            text (str): User's transcribed input
+            session_id (str): Conversation to continue; None for a standalone question
+
+        Yields:
+            tuple[str, Path | None]: Each sentence and its audio file (None if TTS failed)
+        """
+        index = 0
+        async with aclosing(self._areply_sentences(text, session_id)) as sentences:
+            async for sentence in sentences:
+                output_path = await asyncio.to_thread(
+                    self.audio_handler.synthesize, sentence, self.artifacts.new_path("response", ".mp3")
+                )
+                if output_path is not None:
+                    self.artifacts.add(output_path)
+                print(f"🔊 Chunk {index}: {sentence}")
+                yield sentence, output_path
+                index += 1
+
+    async def _areply_sentences(self, text: str, session_id: str = None) -> AsyncIterator[str]:
+        """The GPT reply split into sentences, with tokens consumed by a task on the event loop"""
+        if not text.strip():
+            raise ValueError("Input text is empty.")
+        print(f"🧠 Streaming from GPT: {text}")
+
+        sentences = asyncio.Queue()
+
+        async def produce():
+            try:
+                tokens = self.ai_handler.stream_gpt_response_async(text, session_id)
+                async for sentence in aiter_sentences(tokens, self.config.STREAM_MIN_CHARS):
+                    await sentences.put(sentence)
+                await sentences.put(None)
+            except Exception as e:
+                await sentences.put(e)
+
+        producer = asyncio.create_task(produce())
+        try:
+            while True:
+                item = await sentences.get()
+                if item is None:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            producer.cancel()
+
+    async def astream_speech(self, text: str, archive: bool = False) -> AsyncIterator[bytes]:
+        """
+        Async counterpart of stream_speech for the ASGI server.
+
+        Each gTTS part is fetched on the default executor, one step at a time,
+        so no thread is held while the client reads; closing the iterator
+        stops synthesis.
+
+        Args:
+            text (str): Text to speak
+            archive (bool): Also keep the MP3 in the artifact store
+
+        Yields:
+            bytes: MP3 data
+        """
+        async with aclosing(step_in_executor(self.stream_speech(text, archive))) as chunks:
+            async for chunk in chunks:
+                yield chunk
+
+    async def astream_reply_audio(self, text: str, session_id: str = None,
+                                  archive: bool = False) -> AsyncIterator[bytes]:
+        """
+        Async counterpart of stream_reply_audio: tokens from the async OpenAI
+        client, speech from astream_speech. Closing the iterator (the client
+        went away) cancels both.
+
+        Args:
+            text (str): User's transcribed input
+            session_id (str): Conversation to continue; None for a standalone question
+            archive (bool): Also keep each sentence's MP3 in the artifact store
+
+        Yields:
+            bytes: MP3 data. A TTS failure before the first chunk is raised (so the
+            request can fail); after that, a sentence whose synthesis fails is left out
+        """
+        produced = False
+        index = 0
+        async with aclosing(self._areply_sentences(text, session_id)) as sentences:
+            async for sentence in sentences:
+                print(f"🔊 Chunk {index}: {sentence}")
+                try:
+                    async with aclosing(self.astream_speech(sentence, archive)) as chunks:
+                        async for chunk in chunks:
+                            produced = True
+                            yield chunk
+                except Exception as e:
+                    if not produced:
+                        raise
+                    print(f"⚠  TTS failed for chunk {index}: {e}")
+                index += 1
+
+    def process_user_input(self, pcm: np.ndarray, speculative: SpeculativeTurn = None) -> tuple[str, Path]:
+        """Process user's audio input and return transcript and file path.
+
+        A speculative turn from the final pause supplies the transcript
+        without decoding the audio again.
+        """
+        if len(pcm) == 0:
             return "", None
 
-        ts = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        wav_path = self.config.OUT_DIR / f"speech_{ts}.wav"
-        self.audio_handler.write_wav(wav_path, pcm)
+        wav_path = self.artifacts.new_path("speech", ".wav")
+
+        if speculative is not None:
+            transcript = speculative.transcript
+            print(f"⚡ Transcribed during the pause: {transcript}")
+        else:
+            parts = []
+            samples = self.audio_handler.pcm_to_float32(pcm)
+            for segment in self.ai_handler.transcribe_segments(samples):
+                print(f"✍  [{segment.start:.1f}s → {segment.end:.1f}s]{segment.text}")
+                parts.append(segment.text)
+            transcript = "".join(parts).strip()
 
-        transcript = self.ai_handler.transcribe_audio(wav_path)
-        wav_path.with_suffix(".txt").write_text(transcript + "\n")
+        if self.config.ARCHIVE_RECORDINGS:
+            # Copy: the capture ring is reused by the next recording
+            threading.Thread(target=self._archive_recording, args=(wav_path, pcm.copy(), transcript)).start()
         return transcript, wav_path
 
+    def _archive_recording(self, wav_path: Path, pcm: np.ndarray, transcript: str):
+        """Write the recording and its transcript to disk off the critical path"""
+        try:
+            self.audio_handler.write_wav(wav_path, pcm)
+            self.artifacts.add(wav_path)
+            wav_path.with_suffix(".txt").write_text(transcript + "\n")
+            self.artifacts.add(wav_path.with_suffix(".txt"))
+        except OSError as e:
+            print(f"⚠  Could not archive {wav_path}: {e}")
+
+    @staticmethod
+    def _parse_yes_no(text: str) -> str | None:
+        text = text.lower().strip()
+        if re.match(r"^\s*y(es)?\b", text):
+            return "yes"
+        elif re.match(r"^\s*n(o)?\b", text):
+            return "no"
+        return None
+
+    def detect_yes_no(self, samples) -> str | None:
+        """Classify a short spoken answer as "yes", "no" or None.
+
+        Short clips go through a capped greedy decode first; anything long,
+        low-confidence or unrecognised falls back to full transcription.
+        """
+        if len(samples) <= self.config.YES_NO_MAX_SEC * self.config.SAMPLE_RATE:
+            text, confidence = self.ai_handler.transcribe_short_answer(samples)
+            answer = self._parse_yes_no(text)
+            if answer is not None and confidence >= self.config.YES_NO_MIN_CONFIDENCE:
+                print(f"⚡ Fast-path answer: {text!r} ({confidence:.2f})")
+                return answer
+
+        ans_text = self.ai_handler.transcribe_audio(samples).lower().strip()
+        print(f"📜 Detected answer: {ans_text!r}")
+        return self._parse_yes_no(ans_text)
+
+    def speak(self, text: str, kind: str):
+        """Speak a fixed prompt, keeping the MP3 as a stored artifact"""
+        mp3_path = self.artifacts.new_path(kind, ".mp3")
+        self.audio_handler.speak(text, mp3_path)
+        self.artifacts.add(mp3_path)
+
+    def adopt_reply(self, transcript: str, speculative: SpeculativeTurn | None, session_id: str = None,
+                    record: bool = True) -> str | None:
+        """The speculatively fetched reply for a turn, recorded in the session; None if there is none.
+
+        With ``record=False`` the caller records it (e.g. only once it has been heard).
+        """
+        if speculative is None or speculative.reply is None:
+            return None
+        try:
+            reply = speculative.reply.result()
+        except Exception as e:
+            print(f"⚠  Speculative reply failed, asking again: {e}")
+            return None
+        if record:
+            self.ai_handler.record_reply(transcript, reply, session_id)
+        return reply
+
+    def reply_to(self, transcript: str, speculative: SpeculativeTurn = None) -> str:
+        """GPT reply for a turn, using the speculative request when it was made for this transcript"""
+        reply = self.adopt_reply(transcript, speculative, self.session_id)
+        if reply is not None:
+            return reply
+        return self.ai_handler.get_gpt_response(transcript, self.session_id)
+
     def handle_continuation(self) -> bool:
         """Handle the continuation prompt and user response"""
-        cont_prompt = "Would you like to continue the chat? Please say Yes or No."
-        print(cont_prompt)
+        print(CONTINUE_PROMPT)
         
-        ts = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.audio_handler.speak(cont_prompt, self.config.OUT_DIR / f"prompt_{ts}.mp3")
+        self.speak(CONTINUE_PROMPT, "prompt")
 
         print("🗣  Speak now…")
-        ans_pcm = self.audio_handler.record_until_silence(self.config.ANS_SILENCE_SEC)
+        # No pause probe: a speculative full transcription of a one-word answer
+        # would only compete with the short-answer decode below
+        ans_pcm = self.audio_handler.record_until_silence(self.config.ANS_SILENCE_SEC, probe=False)
         
-        if not ans_pcm:
+        if len(ans_pcm) == 0:
             return False
 
-        tmp = self.config.OUT_DIR / "ans_temp.wav"
-        self.audio_handler.write_wav(tmp, ans_pcm)
-        ans_text = self.ai_handler.transcribe_audio(tmp).lower().strip()
-        tmp.unlink(missing_ok=True)
-        
-        print(f"📜 Detected answer: {ans_text!r}")
+        answer = self.detect_yes_no(self.audio_handler.pcm_to_float32(ans_pcm))
 
-        if re.match(r"^\s*y(es)?\b", ans_text):
+        if answer == "yes":
             return True
-        elif re.match(r"^\s*n(o)?\b", ans_text):
-            ts = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            self.audio_handler.speak("Good-bye!", self.config.OUT_DIR / f"goodbye_{ts}.mp3")
+        elif answer == "no":
+            self.speak(GOODBYE_PROMPT, "goodbye")
             return False
         return False
 
@@ -120,11 +666,18 @@ class VoiceAssistant:
         """Main conversation loop"""
         print("🤖  CypherGuard voice assistant ready.")
 
+        barge_in = None  # utterance that interrupted the last reply, used as the next turn
         while True:
-            print(f"\n🎙  [Round {self.round_no}] Speak now… (auto-stop after {self.config.END_SILENCE_SEC}s silence)")
-            pcm = self.audio_handler.record_until_silence(self.config.END_SILENCE_SEC)
+            if barge_in is not None:
+                pcm, barge_in = barge_in, None
+            else:
+                print(f"\n🎙  [Round {self.round_no}] Speak now… (auto-stop after {self.config.END_SILENCE_SEC}s silence)")
+                if self.speculator is not None:
+                    self.speculator.arm()
+                pcm = self.audio_handler.record_until_silence(self.config.END_SILENCE_SEC)
+            speculative = self.take_speculation() if len(pcm) else None
             
-            transcript, wav_path = self.process_user_input(pcm)
+            transcript, wav_path = self.process_user_input(pcm, speculative)
             if not transcript:
                 print("No speech detected — exiting.")
                 break
@@ -132,12 +685,28 @@ class VoiceAssistant:
             print("\n—— You said ——\n" + transcript + "\n")
 
             try:
-                reply = self.ai_handler.get_gpt_response(transcript)
+                reply = self.reply_to(transcript, speculative)
                 wav_path.with_suffix(".gpt.txt").write_text(reply + "\n")
+                self.artifacts.add(wav_path.with_suffix(".gpt.txt"))
                 print("—— GPT-4o reply ——\n" + reply + "\n")
                 
                 mp3_path = wav_path.with_suffix(".mp3")
-                self.audio_handler.speak(reply, mp3_path)
+                if self.config.BARGE_IN:
+                    if self.speculator is not None:
+                        self.speculator.arm()
+                    barge_in = self.audio_handler.speak_with_barge_in(
+                        reply, mp3_path, self.config.END_SILENCE_SEC, self.config.BARGE_IN_MS
+                    )
+                    if barge_in is None and self.speculator is not None:
+                        self.speculator.disarm()
+                else:
+                    self.audio_handler.speak(reply, mp3_path)
+                self.artifacts.add(mp3_path)
+
+                if barge_in is not None:
+                    # The user talked over the reply: that is the next turn, no prompt needed
+                    self.round_no += 1
+                    continue
 
                 if not self.handle_continuation():
                     break
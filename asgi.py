@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+ASGI variant of run.py.
+
+Serves the same HTTP API on an asyncio event loop: GPT calls use the async
+OpenAI client, transcription and TTS are offloaded to executor threads, and
+SSE responses are async generators, so open streams don't each hold a thread.
+
+    python asgi.py            # or: hypercorn asgi:app --bind 0.0.0.0:9000
+"""
+import asyncio
+import json
+import logging
+import os
+import sys
+from typing import AsyncIterator
+from urllib.parse import quote
+
+from quart import Quart, Response, abort, jsonify, request, send_file, websocket
+from quart_cors import cors
+
+# Add the project root to Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+app_dir = os.path.join(current_dir, "app")
+sys.path.insert(0, app_dir)
+
+from app.live_session import LiveSession
+from app.voice_assistant import VoiceAssistant
+from utils.aio import iterate_in_executor
+from utils.media import detect_mimetype
+from utils.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, REGISTRY, start_trace
+from speech.ingest import AudioTooLongError
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Initialize Quart app
+app = Quart(__name__)
+app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app = cors(app, allow_origin="*")
+
+# Models load in a background warm-up, started when the server starts serving.
+# Not in spawned helper processes (offline TTS workers), which re-import this
+# script as __mp_main__ when it is run directly.
+assistant = VoiceAssistant() if __name__ != "__mp_main__" else None
+
+
+@app.before_serving
+async def warm_up():
+    assistant.start_warm_up()
+
+
+def sse(payload: dict) -> str:
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+async def session_id_from_request() -> str | None:
+    """Conversation id sent by the client (form field or X-Session-Id header), if any"""
+    form = await request.form
+    return form.get('session_id') or request.headers.get('X-Session-Id') or None
+
+
+async def text_from_request() -> str:
+    """Text sent as JSON, a form field or a query parameter"""
+    data = await request.get_json(silent=True) or {}
+    form = await request.form
+    return (data.get('text') or form.get('text') or request.args.get('text') or '').strip()
+
+
+def wants_archive() -> bool:
+    """Whether to keep a copy of streamed audio in the artifact store (?archive=1)"""
+    return assistant.config.TTS_STREAM_ARCHIVE or request.args.get('archive') in ('1', 'true')
+
+
+async def primed(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Pull the first chunk now, so failures before any audio become an error response"""
+    try:
+        first = await anext(chunks, b'')
+    except BaseException:
+        await chunks.aclose()
+        raise
+
+    async def body():
+        # Closed by Quart when the client disconnects; stop the producer with it
+        try:
+            yield first
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            await chunks.aclose()
+
+    return body()
+
+
+def wants_trace() -> bool:
+    """Whether the client asked for per-stage timings (?trace=1)"""
+    return request.args.get('trace') in ('1', 'true')
+
+
+UPLOAD_CHUNK_BYTES = 64 * 1024
+
+
+async def _file_chunks(stream) -> AsyncIterator[bytes]:
+    while chunk := stream.read(UPLOAD_CHUNK_BYTES):
+        yield chunk
+
+
+async def upload_chunks() -> AsyncIterator[bytes] | None:
+    """The uploaded audio as a stream of chunks: a multipart 'audio' field or a raw audio/* body"""
+    if request.mimetype.startswith('audio/') or request.mimetype == 'application/octet-stream':
+        return request.body
+    files = await request.files
+    if 'audio' not in files:
+        return None
+    return _file_chunks(files['audio'].stream)
+
+
+async def decode_upload():
+    """Decode the uploaded audio in memory; returns (samples, None) or (None, error response)"""
+    chunks = await upload_chunks()
+    if chunks is None:
+        return None, ({"status": "error", "message": "No audio file uploaded"}, 400)
+    try:
+        samples = await assistant.adecode_upload(chunks)
+    except Exception as e:
+        logger.error(f"❌ Error decoding audio: {str(e)}")
+        return None, ({"status": "error", "message": str(e)}, 413 if isinstance(e, AudioTooLongError) else 400)
+    logger.info(f"✅ Received audio: {len(samples) / assistant.config.SAMPLE_RATE:.1f}s")
+    return samples, None
+
+
+@app.route('/healthz', methods=['GET'])
+async def healthz():
+    """Liveness: the process is up and serving HTTP"""
+    return jsonify({"status": "ok"})
+
+
+@app.route('/readyz', methods=['GET'])
+async def readyz():
+    """Readiness: models are loaded and warmed up, so traffic can be routed here"""
+    if assistant.ready.is_set():
+        return jsonify({"status": "ready"})
+    assistant.start_warm_up()
+    if assistant.warm_up_error is not None:
+        return jsonify({"status": "error", "message": str(assistant.warm_up_error)}), 503
+    return jsonify({"status": "warming_up"}), 503
+
+
+@app.route('/api/workers', methods=['GET'])
+async def get_workers():
+    """Get transcription queue depth, per-worker stats and artifact storage usage"""
+    return jsonify({
+        "status": "success",
+        "transcription": assistant.ai_handler.whisper_pool.stats(),
+        "artifacts": assistant.artifacts.stats(),
+        "offline_tts": assistant.audio_handler.renderer.stats() if assistant.audio_handler.renderer else None,
+        "ingest": assistant.ingest.stats(),
+        "response_cache": assistant.ai_handler.response_cache.stats() if assistant.ai_handler.response_cache else None
+    })
+
+
+@app.route('/metrics', methods=['GET'])
+async def metrics():
+    """Per-stage latency histograms, queue depths and cache hit rates for Prometheus"""
+    return Response(REGISTRY.render(), content_type=METRICS_CONTENT_TYPE)
+
+
+@app.route('/api/process-audio', methods=['POST'])
+async def process_audio():
+    try:
+        trace = start_trace()
+        samples, error = await decode_upload()
+        if error is not None:
+            payload, status = error
+            return jsonify(payload), status
+
+        # Transcribe audio (to_thread keeps the request trace in context)
+        transcript = await asyncio.to_thread(assistant.transcribe_from_file, samples)
+        logger.info(f"📝 Transcription: {transcript}")
+
+        # Process with GPT
+        if not transcript.strip():
+            raise ValueError("Input text is empty.")
+        gpt_response = await assistant.ai_handler.get_gpt_response_async(transcript, await session_id_from_request())
+        logger.info(f"🤖 GPT Response: {gpt_response}")
+
+        # Convert GPT response to speech
+        audio_output_path = await asyncio.to_thread(assistant.text_to_speech, gpt_response)
+        logger.info(f"🔊 TTS output saved at: {audio_output_path}")
+
+        result = {
+            "status": "success",
+            "transcription": transcript,
+            "gpt_response": gpt_response,
+            "audio_url": str(audio_output_path)
+        }
+        if wants_trace():
+            result["trace"] = trace.as_dict()
+        return jsonify(result)
+
+    except Exception as e:
+        logger.error(f"❌ Error processing audio: {str(e)}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@app.route('/api/stream-process-audio', methods=['POST'])
+async def stream_process_audio():
+    trace = start_trace()
+    samples, error = await decode_upload()
+    session_id = await session_id_from_request()
+    trace_requested = wants_trace()
+    if error is not None:
+        payload, status = error
+        return Response(sse(payload), status=status, mimetype='text/event-stream')
+
+    async def generate():
+        start_trace(trace)
+        try:
+            # Step 1: Transcribe, forwarding each segment as soon as it is decoded
+            parts = []
+            async for segment in iterate_in_executor(assistant.transcribe_segments_from_file, samples):
+                parts.append(segment.text)
+                yield sse({'type': 'partial_transcript', 'start': segment.start, 'end': segment.end, 'value': segment.text.strip()})
+            transcript = "".join(parts).strip()
+            logger.info(f"📝 Transcription: {transcript}")
+            yield sse({'type': 'transcript', 'value': transcript})
+
+            if assistant.config.STREAM_TTS:
+                # Step 2+3: Stream GPT tokens and synthesize each sentence as it completes
+                sentences = []
+                index = 0
+                async for sentence, audio_output_path in assistant.astream_reply(transcript, session_id):
+                    sentences.append(sentence)
+                    yield sse({'type': 'gpt_chunk', 'index': index, 'value': sentence})
+                    if audio_output_path is None:
+                        logger.warning(f"⚠  TTS failed for chunk {index}")
+                    else:
+                        logger.info(f"🔊 TTS chunk {index} saved at: {audio_output_path}")
+                        yield sse({'type': 'audio', 'index': index, 'value': f'/audio/{audio_output_path.name}'})
+                    index += 1
+
+                gpt_response = " ".join(sentences)
+                logger.info(f"🤖 GPT Response: {gpt_response}")
+                yield sse({'type': 'gpt', 'value': gpt_response})
+            else:
+                # Step 2: GPT Response
+                if not transcript.strip():
+                    raise ValueError("Input text is empty.")
+                gpt_response = await assistant.ai_handler.get_gpt_response_async(transcript, session_id)
+                logger.info(f"🤖 GPT Response: {gpt_response}")
+                yield sse({'type': 'gpt', 'value': gpt_response})
+
+                # Step 3: TTS Output
+                audio_output_path = await asyncio.to_thread(assistant.text_to_speech, gpt_response)
+                logger.info(f"🔊 TTS output saved at: {audio_output_path}")
+                yield sse({'type': 'audio', 'value': f'/audio/{audio_output_path.name}'})
+
+            if trace_requested:
+                yield sse({'type': 'trace', 'value': trace.as_dict()})
+            yield "event: end\ndata: end\n\n"
+
+        except Exception as e:
+            logger.error(f"❌ Streaming error: {str(e)}")
+            yield sse({'status': 'error', 'message': str(e)})
+
+    response = Response(generate(), mimetype='text/event-stream')
+    response.timeout = None
+    return response
+
+
+@app.websocket('/ws/live')
+async def live_audio():
+    """Live microphone audio: binary 16 kHz int16 mono PCM in, JSON events out (see LiveSession)"""
+    loop = asyncio.get_running_loop()
+    outbox = asyncio.Queue()
+
+    def send(event: dict):
+        # Called from the session's worker threads as well as the event loop
+        loop.call_soon_threadsafe(outbox.put_nowait, event)
+
+    async def pump():
+        while True:
+            await websocket.send(json.dumps(await outbox.get()))
+
+    session_id = websocket.args.get('session_id') or websocket.headers.get('X-Session-Id')
+    session = LiveSession(assistant, send, session_id)
+    sender = asyncio.create_task(pump())
+    logger.info(f"🎧 Live session {session.session_id} opened")
+    try:
+        while True:
+            message = await websocket.receive()
+            if isinstance(message, str):
+                session.control(message)
+            elif message:
+                session.feed(message)
+    finally:
+        sender.cancel()
+        session.close()
+        logger.info(f"🎧 Live session {session.session_id} closed")
+
+
+@app.route('/api/tts-stream', methods=['GET', 'POST'])
+async def tts_stream():
+    """Speak ``text`` as a chunked audio/mpeg response; playback can start on the first chunk"""
+    text = await text_from_request()
+    if not text:
+        return jsonify({"status": "error", "message": "No text provided"}), 400
+    try:
+        body = await primed(assistant.astream_speech(text, wants_archive()))
+    except Exception as e:
+        logger.error(f"❌ TTS stream failed: {str(e)}")
+        return jsonify({"status": "error", "message": str(e)}), 502
+    response = Response(body, mimetype='audio/mpeg', headers={'Cache-Control': 'no-store'})
+    response.timeout = None
+    return response
+
+
+@app.route('/api/stream-reply', methods=['POST'])
+async def stream_reply_audio():
+    """Transcribe an upload (or take ``text``) and stream the spoken GPT reply as chunked audio/mpeg.
+
+    The transcript is sent URL-encoded in the X-Transcript header.
+    """
+    chunks = await upload_chunks()
+    if chunks is not None:
+        try:
+            samples = await assistant.adecode_upload(chunks)
+        except Exception as e:
+            logger.error(f"❌ Error decoding audio: {str(e)}")
+            return jsonify({"status": "error", "message": str(e)}), 413 if isinstance(e, AudioTooLongError) else 400
+        try:
+            transcript = await asyncio.to_thread(assistant.transcribe_from_file, samples)
+        except Exception as e:
+            logger.error(f"❌ Error processing audio: {str(e)}")
+            return jsonify({"status": "error", "message": str(e)}), 500
+    else:
+        transcript = await text_from_request()
+    if not transcript:
+        return jsonify({"status": "error", "message": "No speech or text provided"}), 400
+    logger.info(f"📝 Transcription: {transcript}")
+
+    session_id = await session_id_from_request()
+    try:
+        body = await primed(assistant.astream_reply_audio(transcript, session_id, wants_archive()))
+    except Exception as e:
+        logger.error(f"❌ Reply stream failed: {str(e)}")
+        return jsonify({"status": "error", "message": str(e)}), 502
+    headers = {
+        'X-Transcript': quote(transcript),
+        'Access-Control-Expose-Headers': 'X-Transcript',
+        'Cache-Control': 'no-store',
+    }
+    response = Response(body, mimetype='audio/mpeg', headers=headers)
+    response.timeout = None
+    return response
+
+
+@app.route("/audio/<filename>")
+async def serve_audio(filename):
+    file_path = assistant.artifacts.lookup(filename)
+    if file_path is None:
+        abort(404)
+    # Quart handles ETag/Last-Modified, 304s and Range requests when conditional
+    response = await send_file(file_path, mimetype=detect_mimetype(file_path), conditional=True)
+    response.headers['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def main():
+    from hypercorn.asyncio import serve
+    from hypercorn.config import Config as HypercornConfig
+
+    try:
+        port = int(os.environ.get("PORT", 9000))
+        config = HypercornConfig()
+        config.bind = [f"0.0.0.0:{port}"]
+        logger.info("🚀 Starting Voice Assistant ASGI Server...")
+        logger.info(f"🌐 API Server running at http://localhost:{port}")
+        asyncio.run(serve(app, config))
+    except KeyboardInterrupt:
+        logger.info("\n⏹️ Server stopped by user")
+    except Exception as e:
+        logger.error(f"❌ Error: {str(e)}")
+    finally:
+        logger.info("🚪 Session closed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Offline end-to-end benchmark.
+
+Starts local stand-ins for OpenAI and gTTS, drives the pipeline at each
+concurrency level and writes JSON with p50/p95/p99 per stage, end-to-end
+latency, requests per second and peak RSS:
+
+    python bench/run_bench.py --concurrency 1,2,4,8 --requests 16 --out bench.json
+
+Scenarios:
+    assistant   VoiceAssistant directly: transcribe a clip, stream the reply,
+                synthesize each sentence
+    http        run.py's /api/stream-process-audio through Flask's test client
+
+Nothing leaves the machine, but the Whisper model has to be in the local
+Hugging Face cache already.
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+import wave
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "app"))
+
+from stubs import StubOpenAI, StubTTS
+
+SAMPLE_RATE = 16000
+SPEECH_WAV = ROOT / "speech_20250618_014300.wav"
+CLIPS = ("original", "short_1s", "short_3s", "tiled_x2", "tiled_x4")
+FALLBACK_TEXT = "How do I rotate an API key?"
+
+
+def percentiles(values: list[float]) -> dict | None:
+    if not values:
+        return None
+    a = np.asarray(values)
+    return {
+        "count": len(values),
+        "mean": round(float(a.mean()), 4),
+        "p50": round(float(np.percentile(a, 50)), 4),
+        "p95": round(float(np.percentile(a, 95)), 4),
+        "p99": round(float(np.percentile(a, 99)), 4),
+    }
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def write_clip(path: Path, samples: np.ndarray):
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16)
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(SAMPLE_RATE)
+        wf.writeframes(pcm.tobytes())
+
+
+def make_clips(out_dir: Path, names: list[str]) -> list[Path]:
+    """The bundled recording plus truncated and tiled variants of it"""
+    from faster_whisper import decode_audio
+
+    samples = decode_audio(str(SPEECH_WAV), sampling_rate=SAMPLE_RATE)
+    variants = {
+        "original": samples,
+        "short_1s": samples[:SAMPLE_RATE],
+        "short_3s": samples[:3 * SAMPLE_RATE],
+        "tiled_x2": np.tile(samples, 2),
+        "tiled_x4": np.tile(samples, 4),
+    }
+    paths = []
+    for name in names:
+        path = out_dir / f"{name}.wav"
+        write_clip(path, variants[name])
+        paths.append(path)
+    return paths
+
+
+def run_assistant(assistant, clip: Path) -> dict:
+    from utils.metrics import start_trace
+
+    trace = start_trace()
+    transcript = assistant.transcribe_from_file(clip) or FALLBACK_TEXT
+    for _ in assistant.stream_reply(transcript):
+        pass
+    return trace.as_dict()
+
+
+def run_http(client, clip: Path) -> dict:
+    with open(clip, "rb") as f:
+        response = client.post(
+            "/api/stream-process-audio?trace=1",
+            data={"audio": (f, clip.name)},
+            content_type="multipart/form-data"
+        )
+    trace = None
+    for line in response.get_data(as_text=True).splitlines():
+        if not line.startswith("data: {"):
+            continue
+        event = json.loads(line[len("data: "):])
+        if event.get("status") == "error":
+            raise RuntimeError(event.get("message"))
+        if event.get("type") == "trace":
+            trace = event["value"]
+    if trace is None:
+        raise RuntimeError("Stream ended without a trace event")
+    return trace
+
+
+def sweep(call, clips: list[Path], levels: list[int], requests_per_level: int) -> list[dict]:
+    results = []
+    for level in levels:
+        latencies, stages, errors = [], defaultdict(list), []
+
+        def one(i: int):
+            start = time.perf_counter()
+            trace = call(clips[i % len(clips)])
+            return time.perf_counter() - start, trace
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=level) as executor:
+            futures = [executor.submit(one, i) for i in range(requests_per_level)]
+            for future in futures:
+                try:
+                    latency, trace = future.result()
+                except Exception as e:
+                    errors.append(str(e))
+                    continue
+                latencies.append(latency)
+                for stage in trace["stages"]:
+                    stages[stage["stage"]].append(stage["seconds"])
+        wall = time.perf_counter() - started
+
+        results.append({
+            "concurrency": level,
+            "requests": requests_per_level,
+            "errors": len(errors),
+            "first_error": errors[0] if errors else None,
+            "wall_sec": round(wall, 3),
+            "rps": round(len(latencies) / wall, 3),
+            "latency": percentiles(latencies),
+            "stages": {name: percentiles(values) for name, values in sorted(stages.items())},
+            "peak_rss_mb": peak_rss_mb(),
+        })
+        print(f"concurrency {level}: {results[-1]['rps']} req/s, p95 {results[-1]['latency'] and results[-1]['latency']['p95']}s",
+              file=sys.stderr)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=("assistant", "http"), default="assistant")
+    parser.add_argument("--concurrency", default="1,2,4,8", help="comma-separated levels")
+    parser.add_argument("--requests", type=int, default=16, help="requests per concurrency level")
+    parser.add_argument("--clips", default="original,short_3s,tiled_x2", help=f"any of {','.join(CLIPS)}")
+    parser.add_argument("--llm-ttft", type=float, default=0.3, help="stub time to first token (s)")
+    parser.add_argument("--llm-token", type=float, default=0.02, help="stub delay between tokens (s)")
+    parser.add_argument("--tts-latency", type=float, default=0.2, help="stub TTS latency per request (s)")
+    parser.add_argument("--with-caches", action="store_true", help="keep the response and TTS caches enabled")
+    parser.add_argument("--out", type=Path, help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.concurrency.split(",")]
+    names = [name for name in args.clips.split(",") if name]
+    unknown = set(names) - set(CLIPS)
+    if unknown:
+        parser.error(f"unknown clips: {', '.join(sorted(unknown))}")
+
+    if args.out:
+        args.out = args.out.resolve()
+
+    openai_stub = StubOpenAI(ttft_sec=args.llm_ttft, token_sec=args.llm_token).start()
+    tts_stub = StubTTS(latency_sec=args.tts_latency).start()
+    os.environ["OPENAI_BASE_URL"] = openai_stub.base_url
+    os.environ["OPENAI_API_KEY"] = "bench"
+
+    # The artifact store (OUT_DIR) and the TTS cache use relative paths; keep them in a scratch dir
+    workdir = Path(tempfile.mkdtemp(prefix="voice-bench-"))
+    os.chdir(workdir)
+    clips = make_clips(workdir, names)
+
+    from utils.config import Config
+    from app.voice_assistant import VoiceAssistant
+
+    config = Config(
+        TTS_ENDPOINT=tts_stub.url,
+        TTS_PREWARM=False,
+        RESPONSE_CACHE_SIZE=Config.RESPONSE_CACHE_SIZE if args.with_caches else 0
+    )
+    assistant = VoiceAssistant(config)
+    if not args.with_caches:
+        assistant.audio_handler.tts_cache = None
+
+    if args.scenario == "http":
+        import run
+        run.assistant = assistant
+        client = run.app.test_client()
+        call = lambda clip: run_http(client, clip)
+    else:
+        call = lambda clip: run_assistant(assistant, clip)
+
+    # Load and warm the models before timing anything
+    assistant.warm_up()
+    call(clips[0])
+
+    report = {
+        "scenario": args.scenario,
+        "clips": names,
+        "stubs": {"llm_ttft_sec": args.llm_ttft, "llm_token_sec": args.llm_token, "tts_latency_sec": args.tts_latency},
+        "caches": args.with_caches,
+        "whisper": {"model": config.WHISPER_MODEL, "workers": config.WHISPER_WORKERS, "batch_size": config.TRANSCRIBE_BATCH_SIZE},
+        "levels": sweep(call, clips, levels, args.requests),
+        "stub_requests": {"openai": openai_stub.requests, "tts": tts_stub.requests},
+    }
+    output = json.dumps(report, indent=2)
+    if args.out:
+        args.out.write_text(output + "\n")
+    else:
+        print(output)
+
+    openai_stub.stop()
+    tts_stub.stop()
+
+
+if __name__ == "__main__":
+    main()
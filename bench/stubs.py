@@ -0,0 +1,158 @@
+"""
+Local stand-ins for the OpenAI chat API and the gTTS endpoint.
+
+Both run on a ThreadingHTTPServer in a daemon thread and sleep for a
+configurable time to emulate upstream latency, so the pipeline can be
+benchmarked on a machine with no network access.
+"""
+import base64
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPLY = (
+    "Rotate the API key from the admin console, then update the secret in your deployment. "
+    "Restart the service so it picks up the new value. "
+    "Finally revoke the old key and check the audit log for any use after rotation."
+)
+
+# A few silent MPEG-1 Layer III frames: valid enough for anything that just stores the bytes
+SILENT_MP3 = (b"\xff\xfb\x90\x64" + b"\x00" * 413) * 8
+
+
+class _StubServer:
+    handler = None
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        handler = type(self.handler.__name__, (self.handler,), {"stub": self})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self):
+        with self._lock:
+            self.requests += 1
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, name=type(self).__name__, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class _QuietHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def read_body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def send_body(self, body: bytes, content_type: str, status: int = 200):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _ChatHandler(_QuietHandler):
+    def do_POST(self):
+        stub = self.stub
+        stub.count()
+        try:
+            request = json.loads(self.read_body() or b"{}")
+        except ValueError:
+            self.send_body(b'{"error": {"message": "bad json"}}', "application/json", 400)
+            return
+        model = request.get("model", "stub")
+        time.sleep(stub.ttft_sec)
+
+        if not request.get("stream"):
+            time.sleep(stub.token_sec * len(stub.tokens))
+            body = {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": stub.reply},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": 0, "completion_tokens": len(stub.tokens), "total_tokens": len(stub.tokens)},
+            }
+            self.send_body(json.dumps(body).encode("utf-8"), "application/json")
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i, token in enumerate(stub.tokens):
+            if i:
+                time.sleep(stub.token_sec)
+            chunk = {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+            }
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+class StubOpenAI(_StubServer):
+    """Chat completions (plain and streamed) at ``<url>/v1``; one token per word of ``reply``"""
+    handler = _ChatHandler
+
+    def __init__(self, ttft_sec: float = 0.3, token_sec: float = 0.02, reply: str = REPLY, **kwargs):
+        super().__init__(**kwargs)
+        self.ttft_sec = ttft_sec
+        self.token_sec = token_sec
+        self.reply = reply
+        words = reply.split(" ")
+        self.tokens = [w if i == 0 else f" {w}" for i, w in enumerate(words)]
+
+    @property
+    def base_url(self) -> str:
+        return f"{self.url}/v1"
+
+
+class _TTSHandler(_QuietHandler):
+    def do_POST(self):
+        stub = self.stub
+        stub.count()
+        self.read_body()
+        time.sleep(stub.latency_sec)
+        audio = base64.b64encode(stub.audio).decode("ascii")
+        # Same framing as Google's batchexecute response, which gTTS scans for "jQ1olc"
+        line = '[["wrb.fr","jQ1olc","[\\"' + audio + '\\"]",null,null,null,"generic"]]'
+        body = f")]}}'\n\n{len(line)}\n{line}\n".encode("utf-8")
+        self.send_body(body, "application/json; charset=utf-8")
+
+
+class StubTTS(_StubServer):
+    """gTTS endpoint stand-in returning a short silent MP3 for every text part"""
+    handler = _TTSHandler
+
+    def __init__(self, latency_sec: float = 0.2, audio: bytes = SILENT_MP3, **kwargs):
+        super().__init__(**kwargs)
+        self.latency_sec = latency_sec
+        self.audio = audio
@@ -122,21 +122,22 @@
 #     main() 
 
 #!/usr/bin/env python3
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify
 import os
-from pathlib import Path
 import sys
 import logging
-import shutil
 import uuid
 import threading
 import queue
 from flask import Response
 import json
 from flask_cors import CORS 
-import re   
 from flask import abort
-import requests
+from flask_sock import Sock
+from simple_websocket import ConnectionClosed
+import itertools
+from typing import Iterator
+from urllib.parse import quote
 
 
 # Add the project root to Python path
@@ -144,7 +145,15 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 app_dir = os.path.join(current_dir, "app")
 sys.path.insert(0, app_dir)
 
+from app.live_session import LiveSession
 from app.voice_assistant import VoiceAssistant
+from utils.media import (
+    FileRange, detect_mimetype, http_date, if_range_allows, make_etag,
+    multipart_byteranges, not_modified, parse_range
+)
+from utils.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, REGISTRY, start_trace
+from speech.ingest import AudioTooLongError
+from werkzeug.wsgi import wrap_file
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -155,17 +164,51 @@ app = Flask(__name__)
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 
 CORS(app, origins="*", supports_credentials=True)
-# Clear audio directory on startup
-AUDIO_DIR = Path("audio")
-if AUDIO_DIR.exists():
-    shutil.rmtree(AUDIO_DIR)
-AUDIO_DIR.mkdir(exist_ok=True)
-logger.info("Cleared audio directory")
-
-# Initialize the voice assistant and message queue
-assistant = VoiceAssistant()
+sock = Sock(app)
+
+# Initialize the voice assistant and message queue. Construction is cheap:
+# models load in a background warm-up, started by main() or by the first
+# /readyz probe, and old audio files are expired by the artifact store.
+# Spawned helper processes (offline TTS workers) re-import this script as
+# __mp_main__; they must not build a second assistant, artifact store and
+# sweeper of their own.
+assistant = VoiceAssistant() if __name__ != "__mp_main__" else None
 message_queue = queue.Queue()
 
+def session_id_from(req) -> str | None:
+    """Conversation id sent by the client (form field or X-Session-Id header), if any"""
+    return req.form.get('session_id') or req.headers.get('X-Session-Id') or None
+
+UPLOAD_CHUNK_BYTES = 64 * 1024
+
+def upload_chunks(req) -> Iterator[bytes] | None:
+    """The uploaded audio as a stream of chunks: a multipart 'audio' field or a raw audio/* body"""
+    if 'audio' in req.files:
+        stream = req.files['audio'].stream
+    elif req.mimetype.startswith('audio/') or req.mimetype == 'application/octet-stream':
+        stream = req.stream
+    else:
+        return None
+    return iter(lambda: stream.read(UPLOAD_CHUNK_BYTES), b'')
+
+def text_from(req) -> str:
+    """Text sent as JSON, a form field or a query parameter"""
+    data = req.get_json(silent=True) or {}
+    return (data.get('text') or req.form.get('text') or req.args.get('text') or '').strip()
+
+def wants_archive(req) -> bool:
+    """Whether to keep a copy of streamed audio in the artifact store (?archive=1)"""
+    return assistant.config.TTS_STREAM_ARCHIVE or req.args.get('archive') in ('1', 'true')
+
+def primed(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    """Pull the first chunk now, so failures before any audio become an error response"""
+    first = next(chunks, b'')
+    return itertools.chain([first], chunks)
+
+def wants_trace(req) -> bool:
+    """Whether the client asked for per-stage timings (?trace=1)"""
+    return req.args.get('trace') in ('1', 'true')
+
 def run_voice_assistant():
     """Run the voice assistant in a separate thread"""
     try:
@@ -232,37 +275,99 @@ def stop_assistant():
             "message": str(e)
         }), 500
 
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    """Liveness: the process is up and serving HTTP"""
+    return jsonify({"status": "ok"})
+
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    """Readiness: models are loaded and warmed up, so traffic can be routed here"""
+    if assistant.ready.is_set():
+        return jsonify({"status": "ready"})
+    assistant.start_warm_up()
+    if assistant.warm_up_error is not None:
+        return jsonify({"status": "error", "message": str(assistant.warm_up_error)}), 503
+    return jsonify({"status": "warming_up"}), 503
+
+@app.route('/api/workers', methods=['GET'])
+def get_workers():
+    """Get transcription queue depth, per-worker stats and artifact storage usage"""
+    return jsonify({
+        "status": "success",
+        "transcription": assistant.ai_handler.whisper_pool.stats(),
+        "artifacts": assistant.artifacts.stats(),
+        "offline_tts": assistant.audio_handler.renderer.stats() if assistant.audio_handler.renderer else None,
+        "ingest": assistant.ingest.stats(),
+        "response_cache": assistant.ai_handler.response_cache.stats() if assistant.ai_handler.response_cache else None
+    })
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Per-stage latency histograms, queue depths and cache hit rates for Prometheus"""
+    return Response(REGISTRY.render(), content_type=METRICS_CONTENT_TYPE)
+
+@sock.route('/ws/live')
+def live_audio(ws):
+    """Live microphone audio: binary 16 kHz int16 mono PCM in, JSON events out (see LiveSession)"""
+    send_lock = threading.Lock()
+
+    def send(event: dict):
+        with send_lock:
+            ws.send(json.dumps(event))
+
+    session = LiveSession(assistant, send, request.args.get('session_id') or request.headers.get('X-Session-Id'))
+    logger.info(f"🎧 Live session {session.session_id} opened")
+    try:
+        while True:
+            message = ws.receive()
+            if isinstance(message, str):
+                session.control(message)
+            elif message:
+                session.feed(message)
+    except ConnectionClosed:
+        pass
+    finally:
+        session.close()
+        logger.info(f"🎧 Live session {session.session_id} closed")
+
 # 🔥 NEW: Endpoint to handle audio file from frontend and process it
 @app.route('/api/process-audio', methods=['POST'])
 def process_audio():
     try:
-        if 'audio' not in request.files:
+        chunks = upload_chunks(request)
+        if chunks is None:
             return jsonify({"status": "error", "message": "No audio file uploaded"}), 400
 
-        audio_file = request.files['audio']
-        audio_path = AUDIO_DIR / audio_file.filename
-        audio_file.save(audio_path)
-
-        logger.info(f"✅ Received audio file: {audio_path}")
+        trace = start_trace()
+        try:
+            samples = assistant.decode_upload(chunks)
+        except Exception as e:
+            logger.error(f"❌ Error decoding audio: {str(e)}")
+            return jsonify({"status": "error", "message": str(e)}), 413 if isinstance(e, AudioTooLongError) else 400
+        logger.info(f"✅ Received audio: {len(samples) / assistant.config.SAMPLE_RATE:.1f}s")
 
         # Transcribe audio
-        transcript = assistant.transcribe_from_file(audio_path)
+        transcript = assistant.transcribe_from_file(samples)
         logger.info(f"📝 Transcription: {transcript}")
 
         # Process with GPT
-        gpt_response = assistant.process_text_with_gpt(transcript)
+        gpt_response = assistant.process_text_with_gpt(transcript, session_id_from(request))
         logger.info(f"🤖 GPT Response: {gpt_response}")
 
         # Convert GPT response to speech
         audio_output_path = assistant.text_to_speech(gpt_response)
         logger.info(f"🔊 TTS output saved at: {audio_output_path}")
 
-        return jsonify({
+        result = {
             "status": "success",
             "transcription": transcript,
             "gpt_response": gpt_response,
             "audio_url": str(audio_output_path)
-        })
+        }
+        if wants_trace(request):
+            result["trace"] = trace.as_dict()
+        return jsonify(result)
 
     except Exception as e:
         logger.error(f"❌ Error processing audio: {str(e)}")
@@ -270,35 +375,68 @@ def process_audio():
 
 @app.route('/api/stream-process-audio', methods=['POST'])
 def stream_process_audio():
-    # Move file extraction OUTSIDE the generator
-    if 'audio' not in request.files:
+    # Decode the upload OUTSIDE the generator, while the request body is readable
+    chunks = upload_chunks(request)
+    if chunks is None:
         return Response(
             f"data: {json.dumps({'status': 'error', 'message': 'No audio file uploaded'})}\n\n",
             mimetype='text/event-stream'
         )
 
-    audio_file = request.files['audio']
-    audio_path = AUDIO_DIR / audio_file.filename
-    audio_file.save(audio_path)
-    logger.info(f"✅ Received audio file: {audio_path}")
+    trace = start_trace()
+    try:
+        samples = assistant.decode_upload(chunks)
+    except Exception as e:
+        logger.error(f"❌ Error decoding audio: {str(e)}")
+        return Response(
+            f"data: {json.dumps({'status': 'error', 'message': str(e)})}\n\n",
+            status=413 if isinstance(e, AudioTooLongError) else 400,
+            mimetype='text/event-stream'
+        )
+    session_id = session_id_from(request)
+    trace_requested = wants_trace(request)
+    logger.info(f"✅ Received audio: {len(samples) / assistant.config.SAMPLE_RATE:.1f}s")
 
     def generate():
+        start_trace(trace)
         try:
-            # Step 1: Transcribe
-            transcript = assistant.transcribe_from_file(audio_path)
+            # Step 1: Transcribe, forwarding each segment as soon as it is decoded
+            parts = []
+            for segment in assistant.transcribe_segments_from_file(samples):
+                parts.append(segment.text)
+                yield f"data: {json.dumps({'type': 'partial_transcript', 'start': segment.start, 'end': segment.end, 'value': segment.text.strip()})}\n\n"
+            transcript = "".join(parts).strip()
             logger.info(f"📝 Transcription: {transcript}")
             yield f"data: {json.dumps({'type': 'transcript', 'value': transcript})}\n\n"
 
-            # Step 2: GPT Response
-            gpt_response = assistant.process_text_with_gpt(transcript)
-            logger.info(f"🤖 GPT Response: {gpt_response}")
-            yield f"data: {json.dumps({'type': 'gpt', 'value': gpt_response})}\n\n"
-
-            # Step 3: TTS Output
-            audio_output_path = assistant.text_to_speech(gpt_response)
-            logger.info(f"🔊 TTS output saved at: {audio_output_path}")
-            yield f"data: {json.dumps({'type': 'audio', 'value': f'/audio/{audio_output_path.name}'})}\n\n"
-
+            if assistant.config.STREAM_TTS:
+                # Step 2+3: Stream GPT tokens and synthesize each sentence as it completes
+                sentences = []
+                for index, (sentence, audio_output_path) in enumerate(assistant.stream_reply(transcript, session_id)):
+                    sentences.append(sentence)
+                    yield f"data: {json.dumps({'type': 'gpt_chunk', 'index': index, 'value': sentence})}\n\n"
+                    if audio_output_path is None:
+                        logger.warning(f"⚠  TTS failed for chunk {index}")
+                        continue
+                    logger.info(f"🔊 TTS chunk {index} saved at: {audio_output_path}")
+                    yield f"data: {json.dumps({'type': 'audio', 'index': index, 'value': f'/audio/{audio_output_path.name}'})}\n\n"
+
+                gpt_response = " ".join(sentences)
+                logger.info(f"🤖 GPT Response: {gpt_response}")
+                yield f"data: {json.dumps({'type': 'gpt', 'value': gpt_response})}\n\n"
+            else:
+                # Step 2: GPT Response
+                gpt_response = assistant.process_text_with_gpt(transcript, session_id)
+                logger.info(f"🤖 GPT Response: {gpt_response}")
+                yield f"data: {json.dumps({'type': 'gpt', 'value': gpt_response})}\n\n"
+
+                # Step 3: TTS Output
+                audio_output_path = assistant.text_to_speech(gpt_response)
+                logger.info(f"🔊 TTS output saved at: {audio_output_path}")
+                yield f"data: {json.dumps({'type': 'audio', 'value': f'/audio/{audio_output_path.name}'})}\n\n"
+
+            if trace_requested:
+                yield f"data: {json.dumps({'type': 'trace', 'value': trace.as_dict()})}\n\n"
             yield f"event: end\ndata: end\n\n"
 
         except Exception as e:
@@ -306,39 +444,110 @@ def stream_process_audio():
             yield f"data: {json.dumps({'status': 'error', 'message': str(e)})}\n\n"
 
     return Response(generate(), mimetype='text/event-stream')
-from flask import send_from_directory
+
+
+@app.route('/api/tts-stream', methods=['GET', 'POST'])
+def tts_stream():
+    """Speak ``text`` as a chunked audio/mpeg response; playback can start on the first chunk"""
+    text = text_from(request)
+    if not text:
+        return jsonify({"status": "error", "message": "No text provided"}), 400
+    try:
+        body = primed(assistant.stream_speech(text, wants_archive(request)))
+    except Exception as e:
+        logger.error(f"❌ TTS stream failed: {str(e)}")
+        return jsonify({"status": "error", "message": str(e)}), 502
+    return Response(body, mimetype='audio/mpeg', headers={'Cache-Control': 'no-store'})
+
+@app.route('/api/stream-reply', methods=['POST'])
+def stream_reply_audio():
+    """Transcribe an upload (or take ``text``) and stream the spoken GPT reply as chunked audio/mpeg.
+
+    The transcript is sent URL-encoded in the X-Transcript header.
+    """
+    chunks = upload_chunks(request)
+    if chunks is not None:
+        try:
+            samples = assistant.decode_upload(chunks)
+        except Exception as e:
+            logger.error(f"❌ Error decoding audio: {str(e)}")
+            return jsonify({"status": "error", "message": str(e)}), 413 if isinstance(e, AudioTooLongError) else 400
+        try:
+            transcript = assistant.transcribe_from_file(samples)
+        except Exception as e:
+            logger.error(f"❌ Error processing audio: {str(e)}")
+            return jsonify({"status": "error", "message": str(e)}), 500
+    else:
+        transcript = text_from(request)
+    if not transcript:
+        return jsonify({"status": "error", "message": "No speech or text provided"}), 400
+    logger.info(f"📝 Transcription: {transcript}")
+
+    try:
+        body = primed(assistant.stream_reply_audio(transcript, session_id_from(request), wants_archive(request)))
+    except Exception as e:
+        logger.error(f"❌ Reply stream failed: {str(e)}")
+        return jsonify({"status": "error", "message": str(e)}), 502
+    headers = {
+        'X-Transcript': quote(transcript),
+        'Access-Control-Expose-Headers': 'X-Transcript',
+        'Cache-Control': 'no-store',
+    }
+    return Response(body, mimetype='audio/mpeg', headers=headers)
 
 
 @app.route("/audio/<filename>")
 def serve_audio(filename):
-    file_path = AUDIO_DIR / filename
-    if not os.path.isfile(file_path):
+    file_path = assistant.artifacts.lookup(filename)
+    if file_path is None:
         abort(404)
 
-    range_header = request.headers.get('Range', None)
-    if not range_header:
-        # Full file delivery as fallback
-        return send_file(file_path, mimetype='audio/mpeg')
-
-    # Parse range header
-    size = os.path.getsize(file_path)
-    byte1, byte2 = 0, None
-    match = re.search(r'bytes=(\d+)-(\d*)', range_header)
-    if match:
-        g = match.groups()
-        byte1 = int(g[0])
-        if g[1]:
-            byte2 = int(g[1])
-
-    length = (byte2 + 1 if byte2 else size) - byte1
-    with open(file_path, 'rb') as f:
-        f.seek(byte1)
-        data = f.read(length)
-
-    response = Response(data, 206, mimetype='audio/mpeg', direct_passthrough=True)
-    response.headers.add('Content-Range', f'bytes {byte1}-{byte1 + length - 1}/{size}')
-    response.headers.add('Accept-Ranges', 'bytes')
-    return response
+    st = os.stat(file_path)
+    size = st.st_size
+    etag = make_etag(st)
+    content_type = detect_mimetype(file_path)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(st.st_mtime),
+        'Accept-Ranges': 'bytes',
+        'Cache-Control': 'no-cache',
+    }
+
+    # Conditional request: the browser already has this exact clip
+    if not_modified(request.headers, etag, st.st_mtime):
+        return Response(status=304, headers=headers)
+
+    ranges = None
+    if if_range_allows(request.headers, etag, st.st_mtime):
+        ranges = parse_range(request.headers.get('Range'), size)
+
+    if ranges is None:
+        # Full file delivery through the server's file wrapper (sendfile where supported)
+        body = wrap_file(request.environ, open(file_path, 'rb'))
+        headers['Content-Length'] = str(size)
+        return Response(body, 200, content_type=content_type, headers=headers, direct_passthrough=True)
+
+    if not ranges:
+        headers['Content-Range'] = f'bytes */{size}'
+        return Response(status=416, headers=headers)
+
+    if len(ranges) == 1:
+        start, end = ranges[0]
+        body = wrap_file(request.environ, FileRange(open(file_path, 'rb'), start, end))
+        headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+        headers['Content-Length'] = str(end - start + 1)
+        return Response(body, 206, content_type=content_type, headers=headers, direct_passthrough=True)
+
+    # Several ranges: multipart/byteranges assembled from an mmap of the file
+    boundary = uuid.uuid4().hex
+    body, length = multipart_byteranges(file_path, ranges, size, content_type, boundary)
+    headers['Content-Length'] = str(length)
+    return Response(
+        body, 206,
+        content_type=f'multipart/byteranges; boundary={boundary}',
+        headers=headers,
+        direct_passthrough=True
+    )
 # Optional: Route to serve generated audio file
 # @app.route("/api/audio/<filename>", methods=["GET"])
 # def serve_audio(filename):
@@ -350,6 +559,9 @@ def serve_audio(filename):
 def main():
     try:
         port = int(os.environ.get("PORT", 9000))
+        # Under the debug reloader only the child process serves requests
+        if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+            assistant.start_warm_up()
         logger.info("🚀 Starting Voice Assistant API Server...")
         logger.info(f"🌐 API Server running at http://localhost:{port}")
         app.run(host='0.0.0.0', port=port, debug=True)